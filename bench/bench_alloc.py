@@ -0,0 +1,54 @@
+"""Compare the heap allocated by each operation key with the former closures built on each press.
+
+    python bench/bench_alloc.py
+
+Bytes are the peak traced by tracemalloc during one operation on a two-level stack,
+result included: on the device, every allocated byte brings the next GC pause closer.
+"""
+
+import sys
+import tracemalloc
+from math import pi
+from os.path import dirname, join
+
+sys.path.insert(0, join(dirname(__file__), ".."))
+from rpn_engine import ANGLE_IN, ANGLE_OUT, RPNEngine, UNARY
+
+NAMES = ("sin", "cos", "tan", "asin", "acos", "atan", "f>c", "c>f", "sqrt", "+", "*", "%", "Δ%", "%T", "±%", "MU%P")
+UNARY_NAMES = ("sin", "cos", "tan", "asin", "acos", "atan", "f>c", "c>f", "sqrt")
+
+
+def former_unary(engine, name):
+    """Former routine: a new closure on each press, checking the angle mode inside."""
+    if name in ANGLE_IN:
+        function = ANGLE_IN[name]
+        return engine.evaluate1(lambda x: function(x * pi / 180 if engine.degrees else x))
+    if name in ANGLE_OUT:
+        function = ANGLE_OUT[name]
+        return engine.evaluate1(lambda x: function(x) * 180 / pi if engine.degrees else function(x))
+    return engine.evaluate1(UNARY[name])
+
+def current(engine, name):
+    return engine.unary(name) if name in UNARY_NAMES else engine.binary(name)
+
+def allocated(operation, name):
+    """Return the peak bytes allocated by an operation on a fresh two-level stack, after a warm-up."""
+    engine = RPNEngine()
+    for i in range(2):
+        engine.clear(); engine.push(0.25); engine.push(0.5)
+        tracemalloc.start()
+        operation(engine, name)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return peak
+
+def main():
+    print("{:>6} {:>9} {:>9}".format("key", "former", "table"))
+    for name in NAMES:
+        former = allocated(former_unary, name) if name in UNARY_NAMES else None
+        now = allocated(current, name)
+        print("{:>6} {:>9} {:>9}".format(name, "-" if former is None else former, now))
+
+
+if __name__ == "__main__":
+    main()
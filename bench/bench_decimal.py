@@ -0,0 +1,108 @@
+"""Compare the cost of each operation in decimal mode with float mode, and check the decimals.
+
+    python bench/bench_decimal.py [--decimals 25] [--count 200]
+
+Each operation runs on the same random operands as floats and as fixed-point
+decimals of rpn_decimal. Decimal results are compared with the decimal module of
+CPython, computed with 60 more digits: "exact" counts results whose 21 first
+decimals, those of the fixed XYZT display, are all correct, and "float" counts
+the float results as good.
+"""
+
+import argparse
+import decimal
+import random
+import sys
+from os.path import dirname, join
+from time import perf_counter
+
+sys.path.insert(0, join(dirname(__file__), ".."))
+import rpn_decimal
+from rpn_decimal import to_decimal, UNARY_TABLES
+from rpn_engine import BINARY, UNARY_RADIANS
+
+DISPLAYED = 21  # Decimals of the fixed XYZT display
+UNARY_NAMES = ("sqrt", "exp", "ln", "log", "sin", "cos", "tan", "atan")
+BINARY_NAMES = ("+", "-", "*", "/", "^")
+
+
+def operands(name, count):
+    """Return {count} random operands in the domain of an operation, as texts."""
+    found = []
+    while len(found) < count:
+        x = random.choice((random.uniform(-50, 50), random.uniform(-1, 1), 10**random.uniform(-3, 8)))
+        if name in ("sqrt", "ln", "log", "^"): x = abs(x)
+        if name in ("exp", "^") and abs(x) > 100: continue
+        found.append(repr(x))
+    return found
+
+def reference(name, x, y=None):
+    """Compute an operation with the decimal module of CPython, and more digits."""
+    x = decimal.Decimal(x)
+    if name == "sqrt": return x.sqrt()
+    if name == "exp": return x.exp()
+    if name == "ln": return x.ln()
+    if name == "log": return x.log10()
+    if name in ("sin", "cos", "tan"):
+        pi = rpn_decimal.constant("pi", 120)
+        r = x % (2 * decimal.Decimal(pi).scaleb(-120))
+        sin = cos = 0; term = decimal.Decimal(1); n = 0
+        while term.adjusted() > -100:
+            if n % 2: sin += term if n % 4 == 1 else -term
+            else: cos += term if n % 4 == 0 else -term
+            n += 1; term = term * r / n
+        return {"sin": sin, "cos": cos, "tan": sin / cos}[name]
+    if name == "atan":  # atan(x) = 2 atan(x / (1 + sqrt(1 + x²))) until small
+        k = 0
+        while abs(x) > decimal.Decimal("0.01"): x = x / (1 + (1 + x*x).sqrt()); k += 1
+        total = 0; term = x; n = 1
+        while term.adjusted() > -100: total += term / n; term = -term * x * x; n += 2
+        return total * 2**k
+    y = decimal.Decimal(y)
+    if name == "^": return (y * x.ln()).exp()
+    return BINARY[name](x, y)
+
+def timed(function, arguments):
+    start = perf_counter()
+    for argument in arguments: function(*argument)
+    return (perf_counter() - start) / len(arguments)
+
+def exact(result, expected):
+    """Whether the first DISPLAYED decimals of a result are those of the exact value, rounded."""
+    quantum = decimal.Decimal(1).scaleb(-DISPLAYED)
+    rounded = expected.quantize(quantum, rounding=decimal.ROUND_HALF_UP)
+    return decimal.Decimal(str(result)).quantize(quantum, rounding=decimal.ROUND_HALF_UP) == rounded
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare decimal and float operations: cost and exact decimals.")
+    parser.add_argument("--decimals", type=int, default=25, help="decimals of decimal mode (default: 25)")
+    parser.add_argument("--count", type=int, default=200, help="random operands per operation")
+    args = parser.parse_args(argv)
+    rpn_decimal.decimals = args.decimals
+    decimal.getcontext().prec = args.decimals + 60
+    random.seed(1)
+    table = UNARY_TABLES[0]
+    print("{:>5} {:>10} {:>12} {:>7} {:>8} {:>8}".format("op", "float µs", "decimal µs", "ratio", "exact", "float"))
+    for name in UNARY_NAMES + BINARY_NAMES:
+        texts = operands(name, args.count)
+        if name in BINARY_NAMES:
+            pairs = list(zip(texts, operands(name, args.count)))
+            if name == "^": pairs = [(x, repr(random.uniform(-5, 5))) for x, y in pairs]
+            floats = [(float(x), float(y)) for x, y in pairs]
+            decimals = [(to_decimal(x), to_decimal(y)) for x, y in pairs]
+            function = BINARY[name]; decimal_function = function
+            expected = [reference(name, x, y) for x, y in pairs]
+        else:
+            floats = [(float(x),) for x in texts]
+            decimals = [(to_decimal(x),) for x in texts]
+            function = UNARY_RADIANS[name]; decimal_function = table[name]
+            expected = [reference(name, x) for x in texts]
+        float_time = timed(function, floats); decimal_time = timed(decimal_function, decimals)
+        good = sum(exact(decimal_function(*arguments), value) for arguments, value in zip(decimals, expected))
+        float_good = sum(exact(rpn_decimal.parse(repr(function(*arguments))), value) for arguments, value in zip(floats, expected))
+        print("{:>5} {:>10.2f} {:>12.2f} {:>6.0f}x {:>4}/{:<3} {:>4}/{:<3}".format(name, 1e6*float_time, 1e6*decimal_time,
+              decimal_time / float_time, good, len(decimals), float_good, len(floats)))
+
+
+if __name__ == "__main__":
+    main()
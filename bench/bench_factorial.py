@@ -0,0 +1,37 @@
+"""Compare the exact factorial and its memo table with the former multiplication loop.
+
+    python bench/bench_factorial.py
+"""
+
+import sys
+from os.path import dirname, join
+from time import perf_counter
+
+sys.path.insert(0, join(dirname(__file__), ".."))
+from rpn_factorial import exact_factorial, factorial
+
+
+def loop_factorial(n):
+    """Former routine: multiply n by all numbers below it, one at a time."""
+    prod = 1; max = n
+    while max > 0: prod *= max; max -= 1
+    return prod
+
+def timed(function, n, repeat):
+    start = perf_counter()
+    for i in range(repeat): function(n)
+    return (perf_counter() - start) / repeat
+
+def main():
+    print("{:>6} {:>12} {:>12} {:>12} {:>8}".format("n", "loop", "split", "memo hit", "speedup"))
+    for n in (100, 500, 1000, 2000, 5000, 10000, 20000):
+        repeat = max(1, 20000 // n)
+        assert exact_factorial(n) == loop_factorial(n)
+        old = timed(loop_factorial, n, repeat)
+        new = timed(exact_factorial, n, repeat)
+        factorial(n); hit = timed(factorial, n, repeat)
+        print("{:>6} {:>10.3f}ms {:>10.3f}ms {:>10.4f}ms {:>7.1f}x".format(n, old * 1e3, new * 1e3, hit * 1e3, old / new))
+
+
+if __name__ == "__main__":
+    main()
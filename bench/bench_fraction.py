@@ -0,0 +1,62 @@
+"""Compare the lazy reduction of fractions with eager reduction, on chains of exact operations.
+
+    python bench/bench_fraction.py [--length 400] [--repeat 5]
+
+Each chain of tokens runs on the engine in fraction mode, reducing fractions after
+1 (eager: a GCD at each operation), 4, 8 (the default) or 32 operations. Time is
+per operation, at its fastest of --repeat runs, and digits are those of the
+terms of X at the end, before its last reduction for display.
+"""
+
+import argparse
+import random
+import sys
+from os.path import dirname, join
+from time import perf_counter
+
+sys.path.insert(0, join(dirname(__file__), ".."))
+import rpn_fraction
+from rpn_engine import RPNEngine
+
+BATCHES = (1, 4, 8, 32)
+
+
+def chains(length):
+    """Return the token chains by name."""
+    random.seed(1)
+    harmonic = ["1"] + ["1 {} / +".format(k) for k in range(2, length)]  # 1 + 1/2 + … + 1/n
+    mixed = ["1"] + ["{} * {} / {} +".format(random.randint(1, 9), random.randint(1, 9), random.randint(1, 9))
+                     for i in range(length // 3)]  # Running total with rates and amounts
+    product = ["1"] + ["{} {} / *".format(k + 1, k) for k in range(1, length)]  # Telescoping product, n
+    series = ["0"] + ["1 {} sq / +".format(k) for k in range(1, length // 2)]  # 1/1² + 1/2² + …
+    return {"harmonic": " ".join(harmonic), "mixed": " ".join(mixed), "telescoping": " ".join(product),
+            "squares": " ".join(series)}
+
+def run(tokens, batch):
+    """Run tokens on a fraction engine, and return the seconds per operation and the digits of X."""
+    rpn_fraction.BATCH = batch
+    engine = RPNEngine(); engine.toggle_fraction()
+    start = perf_counter()
+    for token in tokens: engine.run(token)
+    seconds = perf_counter() - start
+    x = engine.stack[0]
+    return seconds / len(tokens), len(str(abs(x.n))) + len(str(x.d))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare lazy and eager reduction of fractions.")
+    parser.add_argument("--length", type=int, default=400, help="terms of each chain")
+    parser.add_argument("--repeat", type=int, default=5, help="runs, keeping the fastest")
+    args = parser.parse_args(argv)
+    print("{:<12} {:>6} {:>10} {:>8} {:>8}".format("chain", "batch", "µs/op", "digits", "speedup"))
+    for name, chain in chains(args.length).items():
+        tokens = chain.split(); eager = None
+        for batch in BATCHES:
+            seconds = min(run(tokens, batch)[0] for i in range(args.repeat))
+            digits = run(tokens, batch)[1]
+            if eager is None: eager = seconds
+            print("{:<12} {:>6} {:>10.2f} {:>8} {:>7.2f}x".format(name, batch, 1e6*seconds, digits, eager / seconds))
+    rpn_fraction.BATCH = 8
+
+
+if __name__ == "__main__":
+    main()
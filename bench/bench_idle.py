@@ -0,0 +1,54 @@
+"""Measure the CPU duty cycle of the calculator while it waits for a key, with and without idle sleeps.
+
+    python bench/bench_idle.py [--seconds 2]
+
+rpn_keys.wait_for_keys() runs on the stub ion module of bench/stubs, with no key
+ever pressed, for --seconds of real time, once with its adaptive sleeps and once
+polling flat out, as the key loops did before. The duty cycle is the CPU time of
+the process over the wall time; scans are the keyboard scans per second.
+"""
+
+import argparse
+import sys
+import time
+from os.path import abspath, dirname, join
+
+BENCH = dirname(abspath(__file__))
+sys.path.insert(0, join(BENCH, "stubs")); sys.path.insert(1, join(BENCH, ".."))
+import ion
+import rpn_keys
+
+
+class NoKeys:
+    """Frames without any key held down, as many as scanned."""
+
+    def __len__(self):
+        return sys.maxsize
+
+    def __getitem__(self, frame):
+        return ()
+
+
+def measure(seconds, busy=False):
+    """Return the duty cycle and the scans per second of an idle wait, polling flat out if {busy}."""
+    sleep = rpn_keys.sleep
+    if busy: rpn_keys.sleep = lambda seconds: None
+    ion.reset(NoKeys())
+    wall = time.perf_counter(); cpu = time.process_time()
+    try: rpn_keys.wait_for_keys(timeout=seconds)
+    finally: rpn_keys.sleep = sleep
+    wall = time.perf_counter() - wall; cpu = time.process_time() - cpu
+    return cpu / wall, (ion.frame + 1) / wall
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the CPU duty cycle while waiting for a key.")
+    parser.add_argument("--seconds", type=float, default=2, help="idle wall time of each measure")
+    args = parser.parse_args(argv)
+    print("{:<10} {:>8} {:>10}".format("wait", "duty", "scans/s"))
+    for name, busy in (("adaptive", False), ("busy", True)):
+        duty, scans = measure(args.seconds, busy)
+        print("{:<10} {:>7.1f}% {:>10.0f}".format(name, 100*duty, scans))
+
+
+if __name__ == "__main__":
+    main()
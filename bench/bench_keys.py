@@ -0,0 +1,175 @@
+"""Replay key sequences on the calculator script, and measure the cost of each keystroke.
+
+    python bench/bench_keys.py [--script rpn.py] [--repeat 5] [--save] [--threshold 0.1] [--time] [--time-threshold 0.5]
+
+The script runs on the stub ion, kandinsky and micropython modules of bench/stubs,
+with a fake clock: one frame per keyboard scan, each key held down for one frame
+then released for one. For each scenario, the mean wall time, fill_rect and
+draw_string calls, pixels filled and keydown() polls per keystroke are written,
+as well as the startup cost up to the first keystroke.
+With --save, results are kept in bench/baseline.json; otherwise they are compared
+with it, and the run fails if a count grew by more than the threshold, or if a
+scenario has no baseline. Counts are the same on any computer; wall times are only
+compared with --time, as they depend on the computer and are noisier: save a
+baseline on yours before comparing them. Save the baseline again in any change
+that adds a scenario or changes what a keystroke draws or scans.
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from os.path import abspath, dirname, join
+from time import perf_counter
+
+BENCH = dirname(abspath(__file__))
+sys.path.insert(0, join(BENCH, "stubs")); sys.path.insert(1, join(BENCH, ".."))
+import ion
+import kandinsky
+
+FRAME = 0.02  # Seconds between two keyboard scans, on the fake clock
+BASELINE = join(BENCH, "baseline.json")
+METRICS = ("time_us", "fill_rect", "draw_string", "pixels", "polls")
+
+KEYS = {
+    "left": 0, "up": 1, "down": 2, "right": 3, "ok": 4, "back": 5, "home": 6, "shift": 12, "alpha": 13, "xnt": 14,
+    "var": 15, "toolbox": 16, "bs": 17, "exp": 18, "ln": 19, "log": 20, "i": 21, "_": 22,
+    "^": 23, "sin": 24, "cos": 25, "tan": 26, "pi": 27, "sqrt": 28, "sq": 29,
+    "7": 30, "8": 31, "9": 32, "(": 33, ")": 34, "4": 36, "5": 37, "6": 38, "*": 39, "/": 40,
+    "1": 42, "2": 43, "3": 44, "+": 45, "-": 46, "0": 48, ".": 49, "ee": 50, "ans": 51, "exe": 52,
+}
+
+# Whitespace-separated key names, "name*n" for n keystrokes of the same key
+SCENARIOS = {
+    "typing": "1 2 3 . 4 5 ok 6 7 8 ok 9 . 0 1 + * 2 / 3 - 1 ee 5 + ans sq sqrt bs bs",
+    "deep_roll": " ".join("{} ok".format(" ".join(str(n))) for n in range(1, 41))
+                 + " (*20 shift (*10 2 0 ( 3 5 shift ( ) up*12 ( up*5 bs",
+    "percentage": "2 0 0 ok 1 5 alpha bs ok alpha bs down ok alpha bs down down ok"
+                  " alpha bs down down down ok alpha bs down*4 ok alpha bs up down back " * 3,
+    "trig_degrees": "3 0 " + "sin shift sin cos shift cos tan shift tan " * 8 + "alpha 4 4 5 sin alpha i 4 5 sin",
+    "fixed_dynamic": "1 ok 2 ok 3 ok 4 . 5 " + "xnt + xnt 6 * xnt ok xnt / " * 6 + "xnt",
+    "selecting": " ".join("{} ok".format(" ".join(str(n))) for n in range(1, 41))
+                 + " up*30 down*4 + + - 3 5 down*3 back up 1 2 ok",
+    "editing": "1 2 3 4 5 6 7 8 left*3 9 0 bs right*2 . 5 ok 7 7 7 7 7 7 left*6 1 right*6 bs + " * 3,
+}
+
+
+def frames_of(sequence):
+    """Return the frames that replay a key sequence, and the indexes of key presses."""
+    frames = [set()]; presses = []
+    for name in sequence.split():
+        name, star, count = name.rpartition("*")
+        if not name or not count.isdigit(): name, count = name + star + count, 1
+        for i in range(int(count)):
+            presses.append(len(frames))
+            frames.append({KEYS[name]}); frames.append(set())
+    return frames, presses
+
+@contextmanager
+def scratch():
+    """Run in a new empty directory, so that the script neither resumes a session nor leaves one."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try: yield directory
+        finally: os.chdir(cwd)
+
+def run(script, sequence):
+    """Run the script on a key sequence, and return the counters sampled at each keystroke and at the end."""
+    frames, presses = frames_of(sequence)
+    pressed = set(presses); samples = []
+    clock = [0.0]
+    def sample():
+        counts = kandinsky.counts
+        samples.append((perf_counter(), counts[0], counts[1], counts[2], ion.polls))
+    def hook(frame):
+        clock[0] = frame * FRAME
+        if frame in pressed: sample()
+    time.monotonic = lambda: clock[0]
+    time.sleep = lambda seconds: None  # Each scan is a frame: idle scans wait for nothing
+    for name in list(sys.modules):  # Fresh modules, without state left by the last run
+        if name.startswith("rpn"): del sys.modules[name]
+    ion.reset(frames, hook); kandinsky.reset()
+    start = (perf_counter(), 0, 0, 0, 0)
+    with open(script, encoding="utf-8") as file: source = file.read()
+    with scratch():
+        try: exec(compile(source, script, "exec"), {"__name__": "__main__"})
+        except ion.Finished: sample()
+    return [start] + samples
+
+def costs(samples):
+    """Return the startup costs, and the costs of each keystroke."""
+    def delta(a, b):
+        return [(b[0] - a[0]) * 1e6] + [b[i] - a[i] for i in range(1, 5)]
+    return delta(samples[0], samples[1]), [delta(samples[i], samples[i+1]) for i in range(1, len(samples) - 1)]
+
+def measure(script, repeat):
+    """Return the startup and mean keystroke costs of each scenario, timing each keystroke at its fastest of {repeat} runs."""
+    results = {}
+    run(script, SCENARIOS["typing"])  # Warm up
+    for name, sequence in SCENARIOS.items():
+        startup = keys = None
+        for i in range(repeat):
+            gc.collect()
+            new_startup, new_keys = costs(run(script, sequence))
+            if keys is None: startup = new_startup; keys = new_keys; continue
+            startup[0] = min(startup[0], new_startup[0])
+            for key, new in zip(keys, new_keys): key[0] = min(key[0], new[0])
+        mean = [sum(key[i] for key in keys) / len(keys) for i in range(5)]
+        results[name] = {"keystrokes": len(keys), "startup": dict(zip(METRICS, startup)), "per_key": dict(zip(METRICS, mean))}
+    return results
+
+def regressions(results, baseline, threshold, time_threshold=None):
+    """Return the descriptions of costs that grew by more than their threshold since the baseline,
+    wall times only with a {time_threshold}."""
+    found = []
+    metrics = METRICS if time_threshold is not None else METRICS[1:]
+    for name, result in results.items():
+        if name not in baseline: found.append("{}: no baseline, run with --save".format(name)); continue
+        for part in ("startup", "per_key"):
+            for metric in metrics:
+                old = baseline[name][part][metric]; new = result[part][metric]
+                if new > old * (1 + (time_threshold if metric == "time_us" else threshold)):
+                    found.append("{} {} {}: {:.1f} -> {:.1f}".format(name, part, metric, old, new))
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the cost of each keystroke of the calculator script.")
+    parser.add_argument("--script", default=join(BENCH, "..", "rpn.py"), help="script to run (default: rpn.py)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs of each scenario, keeping the fastest")
+    parser.add_argument("--save", action="store_true", help="save the results as the new baseline")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline file (default: bench/baseline.json)")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative growth of draws or polls that fails the run")
+    parser.add_argument("--time", action="store_true", help="compare wall times too")
+    parser.add_argument("--time-threshold", type=float, default=0.5, help="relative growth of wall time that fails the run, with --time")
+    args = parser.parse_args(argv)
+
+    results = measure(args.script, args.repeat)
+    print("{:<14} {:>5} {:>10} {:>9} {:>11} {:>9} {:>7}".format("scenario", "keys", "µs/key", "fill/key", "string/key", "pix/key", "polls"))
+    for name, result in results.items():
+        per_key = result["per_key"]
+        print("{:<14} {:>5} {:>10.1f} {:>9.2f} {:>11.2f} {:>9.0f} {:>7.1f}".format(name, result["keystrokes"],
+              *(per_key[metric] for metric in METRICS)))
+        startup = result["startup"]
+        print("{:<14} {:>5} {:>10.1f} {:>9} {:>11} {:>9} {:>7}".format("  startup", "", *(startup[metric] for metric in METRICS)))
+    if args.save:
+        with open(args.baseline, "w") as file: json.dump(results, file, indent=1, sort_keys=True)
+        print("Baseline saved in", args.baseline)
+        return 0
+    try:
+        with open(args.baseline) as file: baseline = json.load(file)
+    except OSError:
+        print("No baseline yet: run with --save first", file=sys.stderr)
+        return 0
+    found = regressions(results, baseline, args.threshold, args.time_threshold if args.time else None)
+    for line in found: print("Regression:", line, file=sys.stderr)
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""Compare the factorisation engine with the former lowest-divisor trial division.
+
+    python bench/bench_prime.py
+"""
+
+import sys
+from os.path import dirname, join
+from random import randrange, seed
+from time import perf_counter
+
+sys.path.insert(0, join(dirname(__file__), ".."))
+from rpn_prime import factorize, is_prime
+
+
+def prime_facto(n):
+    """Former routine: find the lowest prime divisor of a natural number n."""
+    div = 2
+    while div**2 <= n:
+        if n % div == 0: return div
+        div += 1
+    return 1
+
+def random_prime(bits):
+    while True:
+        n = randrange(2**(bits-1), 2**bits) | 1
+        if is_prime(n): return n
+
+def timed(function, numbers):
+    start = perf_counter(); worst = 0
+    for n in numbers:
+        t = perf_counter(); function(n); worst = max(worst, perf_counter() - t)
+    return perf_counter() - start, worst
+
+def main():
+    seed(2026)
+    cases = (
+        ("random 32-bit", [randrange(2, 2**32) for i in range(200)], True),
+        ("primes 40-bit", [random_prime(40) for i in range(5)], True),
+        ("semiprimes 2×20-bit", [random_prime(20) * random_prime(20) for i in range(20)], True),
+        ("random 64-bit", [randrange(2, 2**64) for i in range(200)], False),
+        ("semiprimes 2×32-bit", [random_prime(32) * random_prime(32) for i in range(20)], False),
+    )
+    print("{:22} {:>12} {:>12} {:>12} {:>12}".format("case", "old total", "old worst", "new total", "new worst"))
+    for name, numbers, old in cases:
+        new_total, new_worst = timed(factorize, numbers)
+        if old:  # The former routine takes hours on 64-bit primes and semiprimes
+            old_total, old_worst = timed(prime_facto, numbers)
+            old_total = "{:.4f} s".format(old_total); old_worst = "{:.4f} s".format(old_worst)
+        else:
+            old_total = old_worst = "-"
+        print("{:22} {:>12} {:>12} {:>10.4f} s {:>10.4f} s".format(name, old_total, old_worst, new_total, new_worst))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Compare replaying a keystroke program with typing its keys again, on the calculator script.
+
+    python bench/bench_program.py [--loops 100] [--script rpn.py]
+
+For each chain of keys, the script of bench_keys.py runs it {loops} times from the
+keys, then records it once ([alpha]+[M]) and replays it {loops} times ([alpha]+[N]
+with the count on the command line). Costs are per loop, without the recording:
+wall time, fill_rect and draw_string calls, pixels filled and keydown() polls.
+"""
+
+import argparse
+import sys
+from os.path import dirname, join
+
+sys.path.insert(0, dirname(__file__) or ".")
+from bench_keys import frames_of, run
+
+CHAINS = {  # Chains that leave the stack as deep as they found it
+    "markup": "2 5 alpha bs down*3 ok",  # Price from the cost in X, 25 % markup
+    "trig_degrees": "3 0 + sin shift sin cos shift cos tan shift tan",
+}
+
+
+def last(script, sequence, keys):
+    """Return the costs of the {keys} last keystrokes of a sequence, until the end of the script."""
+    samples = run(script, sequence)
+    return [(samples[-1][0] - samples[-1-keys][0]) * 1e6] + [samples[-1][i] - samples[-1-keys][i] for i in range(1, 5)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare replaying a keystroke program with typing its keys.")
+    parser.add_argument("--script", default=join(dirname(__file__), "..", "rpn.py"), help="script to run (default: rpn.py)")
+    parser.add_argument("--loops", type=int, default=100, help="runs of each chain")
+    args = parser.parse_args(argv)
+    print("{:<14} {:<7} {:>10} {:>9} {:>11} {:>9} {:>7}".format("chain", "by", "µs/loop", "fill", "string", "pixels", "polls"))
+    for name, chain in CHAINS.items():
+        start = "8 0 ok "
+        typed = last(args.script, start + (chain + " ") * args.loops, len(frames_of(chain)[1]) * args.loops)
+        replayed = last(args.script, start + "alpha 7 ok " + chain + " alpha 7 ok " + " ".join(str(args.loops))
+                        + " alpha 8 ok", 3)  # [alpha]+[N], and OK to close the dialog
+        for by, costs in (("keys", typed), ("replay", replayed)):
+            print("{:<14} {:<7} {:>10.1f} {:>9.2f} {:>11.2f} {:>9.0f} {:>7.1f}".format(name, by,
+                  *(cost / args.loops for cost in costs)))
+
+
+if __name__ == "__main__":
+    main()
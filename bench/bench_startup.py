@@ -0,0 +1,95 @@
+"""Measure the startup of the calculator script: time and heap until it waits for the first key.
+
+    python bench/bench_startup.py [--script rpn.py] [--repeat 10] [--levels 1000,100000]
+
+The script runs on the stub modules of bench/stubs, and all modules are compiled
+from source each time, as on the device. Heap is the memory still traced by
+tracemalloc when the first key is awaited: module code, tables and the stack.
+With --levels, the startup is also measured when resuming a session of that many
+levels, with a journal of keystrokes since its snapshot, against the blank start.
+"""
+
+import argparse
+import sys
+import tempfile
+import tracemalloc
+from os.path import abspath, dirname, join
+from time import perf_counter
+
+BENCH = dirname(abspath(__file__))
+sys.path.insert(0, join(BENCH, "stubs"))
+import ion
+from bench_keys import scratch
+
+KEYSTROKES = 100  # Keystrokes in the journal of a resumed session
+
+
+def startup(script, heap=False):
+    """Run the script until it waits for a key, and return the seconds and heap bytes it took, and its modules."""
+    sys.pycache_prefix = tempfile.mkdtemp()  # No cached bytecode: compile everything
+    for name in list(sys.modules):
+        if name.startswith("rpn"): del sys.modules[name]
+    result = []
+    def hook(frame):
+        if frame == 1:  # The main loop scans the keyboard
+            result.append(perf_counter() - start)
+            result.append(tracemalloc.get_traced_memory()[0] if heap else None)
+            result.append(sorted(name for name in sys.modules if name.startswith("rpn")))
+    ion.reset([set(), set()], hook)
+    if heap: tracemalloc.start()
+    start = perf_counter()
+    with open(script, encoding="utf-8") as file: source = file.read()
+    try: exec(compile(source, script, "exec"), {"__name__": "__main__"})
+    except ion.Finished: pass
+    if heap: tracemalloc.stop()
+    return result
+
+def save_session(levels):
+    """Write the files of a session of {levels} levels in the current directory, with a journal of keystrokes."""
+    from rpn_session import Session
+    session = Session(); engine = session.resume()
+    engine.begin()
+    for i in range(levels): engine.stack.push(i + 0.5 if i % 2 else i)
+    engine.end(); session.save(engine)  # Snapshot
+    for i in range(KEYSTROKES):
+        engine.begin(); engine.run(("1", "+", "swap")[i % 3]); engine.end(); session.save(engine)
+    session.close()
+
+def resume_seconds(repeat):
+    """Return the fastest seconds of reading the session files alone, modules loaded."""
+    from rpn_session import Session
+    best = None
+    for i in range(repeat):
+        start = perf_counter(); Session().resume(); seconds = perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+def measure(script, repeat, levels=None):
+    """Return the fastest startup seconds, the heap bytes and modules, and the seconds of resuming alone,
+    with a session of {levels} if given."""
+    with scratch():
+        if levels is not None: save_session(levels)
+        seconds = min(startup(script)[0] for i in range(repeat))
+        return [seconds] + startup(script, True)[1:] + [resume_seconds(repeat)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the startup time and heap of the calculator script.")
+    parser.add_argument("--script", default=join(BENCH, "..", "rpn.py"), help="script to run (default: rpn.py)")
+    parser.add_argument("--repeat", type=int, default=10, help="runs, keeping the fastest")
+    parser.add_argument("--levels", default="", help="comma-separated stack depths of resumed sessions")
+    args = parser.parse_args(argv)
+    args.script = abspath(args.script)
+    sys.path.insert(1, dirname(args.script))
+    sys.dont_write_bytecode = True
+    measure(args.script, 1)  # Warm up
+    seconds, heap, modules, blank = measure(args.script, args.repeat)
+    print("startup {:.1f} ms, heap {:.1f} KB".format(1000*seconds, heap / 1024))
+    print("modules:", " ".join(modules))
+    for levels in (int(levels) for levels in args.levels.split(",") if levels):
+        resumed, resumed_heap, modules, resume = measure(args.script, args.repeat, levels)
+        print("resuming {} levels: startup {:.1f} ms, heap {:.1f} KB, reading the session {:.2f} ms"
+              " (blank {:.2f} ms)".format(levels, 1000*resumed, resumed_heap / 1024, 1000*resume, 1000*blank))
+
+
+if __name__ == "__main__":
+    main()
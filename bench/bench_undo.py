@@ -0,0 +1,58 @@
+"""Measure the cost of UNDO records per keystroke, against copying the stack at each keystroke.
+
+    python bench/bench_undo.py [--keys 200]
+
+For stacks of growing depth, the same keystrokes (typing, +, SWAP, DUP, DROP) run
+between begin() and end(), and the time and heap bytes (tracemalloc) they take are
+written per keystroke: with records, they do not depend on the depth; with copies,
+they grow with it.
+"""
+
+import argparse
+import sys
+import tracemalloc
+from os.path import dirname, join
+from time import perf_counter
+
+sys.path.insert(0, join(dirname(__file__), ".."))
+from rpn_engine import RPNEngine
+from rpn_history import History
+
+DEPTHS = (10, 1000, 100000)
+TOKENS = ("1", "+", "2", "swap", "dup", "drop", "*")
+
+
+def keystrokes(engine, count, copies=None):
+    """Run {count} keystrokes, each one recorded, or copied in {copies} if given."""
+    for i in range(count):
+        token = TOKENS[i % len(TOKENS)]
+        if copies is None:
+            engine.begin(); engine.run(token); engine.end()
+        else:
+            copies.append((list(engine.stack), engine.lastx, engine.entry)); engine.run(token)
+
+def measure(depth, count, copy):
+    """Return the µs and heap bytes per keystroke on a stack of {depth} levels."""
+    engine = RPNEngine(); engine.history = History(budget=10**9)  # Keep every record
+    for i in range(depth): engine.stack.push(i)
+    copies = [] if copy else None
+    tracemalloc.start()
+    start = perf_counter()
+    keystrokes(engine, count, copies)
+    seconds = perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return 1e6 * seconds / count, size / count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the cost of UNDO records per keystroke.")
+    parser.add_argument("--keys", type=int, default=200, help="keystrokes per depth")
+    args = parser.parse_args(argv)
+    print("{:>7} {:>12} {:>12} {:>12} {:>12}".format("depth", "record µs", "record B", "copy µs", "copy B"))
+    for depth in DEPTHS:
+        record = measure(depth, args.keys, False); copy = measure(depth, args.keys, True)
+        print("{:>7} {:>12.1f} {:>12.0f} {:>12.1f} {:>12.0f}".format(depth, record[0], record[1], copy[0], copy[1]))
+
+
+if __name__ == "__main__":
+    main()
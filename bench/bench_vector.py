@@ -0,0 +1,64 @@
+"""Measure the whole-stack operations on deep stacks, with NumPy vectors and with the plain loop of the calculator.
+
+    python bench/bench_vector.py [--depths 1000,100000] [--repeat 3]
+
+Each operation runs as one keystroke (an UNDO step included) on a dynamic stack of
+random floats and integers, at its fastest of --repeat runs. The plain loop is
+the one the calculator runs; NumPy is only used on a computer, if installed.
+"""
+
+import argparse
+import random
+import sys
+from os.path import dirname, join
+from time import perf_counter
+
+sys.path.insert(0, join(dirname(__file__), ".."))
+import rpn_vector
+from rpn_engine import RPNEngine
+
+OPERATIONS = ("all sin", "all f>c", "all sqrt", "1.25 all *", "10 all ±%", "sum", "mean", "max", "sort", "rev")
+
+
+def engine_of(values):
+    engine = RPNEngine()
+    for value in values: engine.stack.push(value)
+    return engine
+
+def timed(values, tokens, repeat):
+    """Return the fastest seconds of the tokens, as one keystroke, on a new stack of values."""
+    best = None
+    for i in range(repeat):
+        engine = engine_of(values)
+        start = perf_counter()
+        engine.begin()
+        for token in tokens: error = engine.run(token)
+        engine.end()
+        seconds = perf_counter() - start
+        if error: raise SystemExit("{}: {}".format(" ".join(tokens), error))
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the whole-stack operations on deep stacks.")
+    parser.add_argument("--depths", default="1000,10000,100000", help="comma-separated stack depths")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of each operation, keeping the fastest")
+    args = parser.parse_args(argv)
+    numpy = rpn_vector.numpy
+    if numpy is None: print("NumPy is not installed: plain loops only")
+    random.seed(1)
+    print("{:>7} {:<12} {:>12} {:>12} {:>8}".format("levels", "operation", "loop ms", "numpy ms", "speedup"))
+    for depth in (int(depth) for depth in args.depths.split(",")):
+        values = [random.choice((random.uniform(1, 100), random.randint(1, 1000))) for i in range(depth)]
+        for operation in OPERATIONS:
+            tokens = operation.split()
+            rpn_vector.numpy = None; loop = timed(values, tokens, args.repeat)
+            rpn_vector.numpy = numpy
+            if numpy is None:
+                print("{:>7} {:<12} {:>12.2f}".format(depth, operation, 1e3*loop)); continue
+            vector = timed(values, tokens, args.repeat)
+            print("{:>7} {:<12} {:>12.2f} {:>12.2f} {:>7.1f}x".format(depth, operation, 1e3*loop, 1e3*vector, loop / vector))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""Stub of the NumWorks ion module: the keys held down are replayed from a list of frames.
+
+A frame starts each time the keyboard is scanned from key 0, as rpn_keys.scan() does.
+"""
+
+frames = [set()]  # Keys held down during each frame
+frame = -1  # Index of the current frame
+polls = 0  # keydown() calls so far
+frame_hook = None  # Called with the index of each new frame
+
+
+class Finished(BaseException):
+    """Raised when the keyboard is scanned past the last frame: the replay is over."""
+
+
+def reset(new_frames, hook=None):
+    """Replay a new list of frames from the start."""
+    global frames, frame, polls, frame_hook
+    frames = new_frames; frame = -1; polls = 0; frame_hook = hook
+
+def keydown(key):
+    global frame, polls
+    polls += 1
+    if key == 0:
+        frame += 1
+        if frame >= len(frames): raise Finished
+        if frame_hook: frame_hook(frame)
+    return key in frames[frame]
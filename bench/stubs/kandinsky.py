@@ -0,0 +1,27 @@
+"""Stub of the NumWorks kandinsky module: draw calls are only counted, and traced on demand."""
+
+counts = [0, 0, 0]  # fill_rect calls, draw_string calls, pixels filled
+trace = None  # List receiving the arguments of each draw call, when set
+
+
+def reset(traced=False):
+    global trace
+    counts[:] = [0, 0, 0]; trace = [] if traced else None
+
+def fill_rect(x, y, width, height, color):
+    counts[0] += 1
+    if trace is not None: trace.append((x, y, width, height, color))
+    counts[2] += max(0, min(x + width, 320) - max(x, 0)) * max(0, min(y + height, 222) - max(y, 0))
+
+def draw_string(text, x, y, color=(0,0,0), background=(255,255,255)):
+    counts[1] += 1
+    if trace is not None: trace.append((text, x, y, color, background))
+
+def set_pixel(x, y, color):
+    counts[2] += 1
+
+def get_pixel(x, y):
+    return (255,255,255)
+
+def color(r, g, b):
+    return (r, g, b)
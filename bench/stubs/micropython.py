@@ -0,0 +1,5 @@
+"""Stub of the MicroPython-specific module."""
+
+
+def kbd_intr(char):
+    pass
@@ -0,0 +1,242 @@
+"""Build the scripts to copy on the calculator: one per language, stripped and minified.
+
+    python build.py [--output dist] [--check]
+
+rpn.py and its modules are the only source, in English. For each catalog of
+locales/, the strings of rpn.py and rpn_menus.py are translated, and these two
+scripts get the suffix of the language, eg. rpn_fr.py importing rpn_menus_fr.py.
+All scripts are then stripped of comments and docstrings, their local variables
+get short names, and they are indented by one space, so that the calculator has
+less to parse and keep in its heap. Sizes and compile times are written for each
+language. With --check, key sequences are replayed on each built script and on
+its unminified translation, which must draw the same and end in the same state.
+"""
+
+import argparse
+import ast
+import builtins
+import io
+import json
+import keyword
+import shutil
+import sys
+import tempfile
+import time
+import tokenize
+from os import listdir, makedirs
+from os.path import abspath, dirname, join
+from time import perf_counter
+
+ROOT = dirname(abspath(__file__))
+LOCALIZED = ("rpn.py", "rpn_menus.py")  # Scripts with strings, named after the language
+SHARED = ("rpn_keys.py", "rpn_engine.py", "rpn_stack.py", "rpn_render.py", "rpn_format.py",
+          "rpn_prime.py", "rpn_factorial.py", "rpn_profile.py", "rpn_decimal.py",
+          "rpn_fraction.py", "rpn_history.py", "rpn_program.py",
+          "rpn_vector.py", "rpn_session.py")
+CHECKS = {  # Key sequences replayed by --check, besides the benchmark scenarios
+    "dialogs": "var ok toolbox back 1 ok 0 / ok alpha home ok 1 ( 9 ( bs bs alpha ( alpha 7",
+    "decimals": "xnt 2 sqrt alpha _ ok 3 0 sin 1 ok 3 / 3 0 alpha _ ok pi alpha _ ok",
+    "fractions": "alpha ) ok 1 ok 3 / 2 ok 7 / + 2 ^ alpha ) ok xnt alpha ) ok",
+    "whole": "1 ok 2 ok 3 ok 4 alpha exp sin alpha 5 down*5 ok back 2 5 alpha exp alpha bs down*3 ok alpha 5 ok",
+    "program": "alpha 8 ok 1 0 0 ok alpha 7 ok 1 . 1 * alpha bs ok 3 ok sin alpha 7 ok 3 alpha 8 ok back",
+}
+
+
+# CATALOGS
+
+def catalogs():
+    """Return the catalogs by language: English first, then those of locales/."""
+    found = {"en": {"suffix": "", "strings": {}, "messages": {}}}
+    directory = join(ROOT, "locales")
+    for name in sorted(listdir(directory)):
+        if name.endswith(".json"):
+            with open(join(directory, name), encoding="utf-8") as file: found[name[:-5]] = json.load(file)
+    return found
+
+class Translator(ast.NodeTransformer):
+    """Translate the strings of a script, fill its MESSAGES table, and rename its localized imports."""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def visit_Constant(self, node):
+        strings = self.catalog["strings"]
+        if isinstance(node.value, str) and node.value in strings:
+            return ast.copy_location(ast.Constant(strings[node.value]), node)
+        return node
+
+    def visit_Assign(self, node):
+        target = node.targets[0]
+        if isinstance(target, ast.Name) and target.id == "MESSAGES":
+            messages = self.catalog["messages"]
+            node.value = ast.Dict([ast.Constant(key) for key in messages], [ast.Constant(messages[key]) for key in messages])
+            return node
+        return self.generic_visit(node)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            if alias.name + ".py" in LOCALIZED and self.catalog["suffix"]:
+                alias.asname = alias.asname or alias.name; alias.name += self.catalog["suffix"]
+        return node
+
+
+# MINIFICATION
+
+def strip_docstrings(tree):
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef)) and node.body:
+            first = node.body[0]
+            if isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant) and isinstance(first.value.value, str):
+                node.body = node.body[1:] or [ast.Pass()]
+
+def short_names(taken):
+    """Yield the identifiers a, b, …, z, aa, ab, … that are not {taken}."""
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    for first in [""] + list(letters):
+        for last in letters:
+            if first + last not in taken: yield first + last
+
+def rename_locals(tree):
+    """Give short names to the local variables of functions, keeping parameters, which may be keywords."""
+    taken = set(dir(builtins)) | set(keyword.kwlist)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name): taken.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.ClassDef)): taken.add(node.name)
+        elif isinstance(node, ast.alias): taken.add(node.asname or node.name.split(".")[0])
+    functions = [node for parent in ast.walk(tree) if isinstance(parent, (ast.Module, ast.ClassDef))
+                 for node in parent.body if isinstance(node, ast.FunctionDef)]
+    for function in functions:
+        nodes = list(ast.walk(function))
+        kept = set()  # Parameters, globals, imports and nested functions
+        for node in nodes:
+            if isinstance(node, (ast.FunctionDef, ast.Lambda)):
+                arguments = node.args
+                for argument in arguments.posonlyargs + arguments.args + arguments.kwonlyargs + [arguments.vararg, arguments.kwarg]:
+                    if argument: kept.add(argument.arg)
+                if node is not function and isinstance(node, ast.FunctionDef): kept.add(node.name)
+            elif isinstance(node, (ast.Global, ast.Nonlocal)): kept.update(node.names)
+            elif isinstance(node, ast.alias): kept.add(node.asname or node.name.split(".")[0])
+        local = {node.id for node in nodes if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load)}
+        local |= {node.name for node in nodes if isinstance(node, ast.ExceptHandler) and node.name}
+        names = short_names(taken)
+        renamed = {name: next(names) for name in sorted(local - kept) if len(name) > 2}
+        for node in nodes:
+            if isinstance(node, ast.Name) and node.id in renamed: node.id = renamed[node.id]
+            elif isinstance(node, ast.ExceptHandler) and node.name in renamed: node.name = renamed[node.name]
+
+def compact(source):
+    """Drop the spaces that tokens do not need, and indent by one space per level."""
+    lines = []; line = last = ""; depth = 0
+    for token in tokenize.generate_tokens(io.StringIO(source).readline):
+        kind, text = token.type, token.string
+        if kind == tokenize.INDENT: depth += 1
+        elif kind == tokenize.DEDENT: depth -= 1
+        elif kind in (tokenize.NEWLINE, tokenize.NL):
+            if line: lines.append(" " * depth + line)
+            line = last = ""
+        elif kind not in (tokenize.COMMENT, tokenize.ENDMARKER):
+            if last and (last[-1].isalnum() or last[-1] in "_'\"") and (text[0].isalnum() or text[0] in "_'\""): line += " "
+            line += text; last = text
+    return "\n".join(lines) + "\n"
+
+def minify(tree):
+    """Return the source of a tree, stripped and compacted."""
+    strip_docstrings(tree); rename_locals(tree)
+    return compact(ast.unparse(tree))
+
+
+# BUILD
+
+def read(name):
+    with open(join(ROOT, name), encoding="utf-8") as file: return file.read()
+
+def write(directory, name, source):
+    with open(join(directory, name), "w", encoding="utf-8") as file: file.write(source)
+
+def output_name(name, catalog):
+    return name[:-3] + catalog["suffix"] + ".py" if name in LOCALIZED else name
+
+def build(language, catalog, output, plain=None):
+    """Write the scripts of a language in {output}, and their unminified translation in {plain} if any."""
+    for name in LOCALIZED + SHARED:
+        if name in SHARED and language != "en": continue  # Built once
+        tree = ast.parse(read(name))
+        if name in LOCALIZED: tree = ast.fix_missing_locations(Translator(catalog).visit(tree))
+        if plain: write(plain, output_name(name, catalog), ast.unparse(tree) + "\n")
+        write(output, output_name(name, catalog), minify(tree))
+
+def compile_time(source, name, repeat=20):
+    best = None
+    for i in range(repeat):
+        start = perf_counter(); compile(source, name, "exec")
+        seconds = perf_counter() - start
+        if best is None or seconds < best: best = seconds
+    return best
+
+def report(language, catalog, output):
+    """Write the size and compile time of the scripts of a language, before and after minification."""
+    print("{} ({}):".format(language, output_name("rpn.py", catalog)))
+    total = [0, 0, 0, 0]
+    for name in LOCALIZED + SHARED:
+        source = read(name); built = read(join(output, output_name(name, catalog)))
+        sizes = len(source.encode()), len(built.encode())
+        times = compile_time(source, name), compile_time(built, name)
+        print("  {:<18} {:>6} -> {:>6} bytes  {:>6.2f} -> {:>6.2f} ms".format(output_name(name, catalog), sizes[0], sizes[1], 1000*times[0], 1000*times[1]))
+        total = [total[0] + sizes[0], total[1] + sizes[1], total[2] + times[0], total[3] + times[1]]
+    print("  {:<18} {:>6} -> {:>6} bytes  {:>6.2f} -> {:>6.2f} ms".format("total", total[0], total[1], 1000*total[2], 1000*total[3]))
+
+
+# CHECK
+
+def replay(directory, script, sequence):
+    """Run a script of {directory} on a key sequence, and return its draw calls and final state."""
+    import ion, kandinsky
+    from bench_keys import FRAME, frames_of, scratch
+    directory = abspath(directory); frames = frames_of(sequence)[0]; clock = [0.0]
+    def hook(frame): clock[0] = frame * FRAME
+    time.monotonic = lambda: clock[0]
+    time.sleep = lambda seconds: None  # Each scan is a frame: idle scans wait for nothing
+    for name in list(sys.modules):
+        if name.startswith("rpn"): del sys.modules[name]
+    sys.path.insert(0, directory)
+    ion.reset(frames, hook); kandinsky.reset(True)
+    namespace = {"__name__": "__main__"}
+    try:
+        with scratch(): exec(compile(read(join(directory, script)), script, "exec"), namespace)
+    except ion.Finished: pass
+    finally: sys.path.remove(directory)
+    engine = namespace["engine"]
+    return kandinsky.trace, (list(engine.stack), engine.entry, str(engine.lastx), engine.degrees, engine.fixed)
+
+def check(language, catalog, output, plain):
+    """Return the names of the key sequences on which the built scripts of a language differ from their source."""
+    sys.path.insert(0, join(ROOT, "bench"))
+    from bench_keys import SCENARIOS
+    script = output_name("rpn.py", catalog); failed = []
+    for name, sequence in list(SCENARIOS.items()) + list(CHECKS.items()):
+        if replay(plain, script, sequence) != replay(output, script, sequence): failed.append(name)
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the minified scripts of each language.")
+    parser.add_argument("--output", default=join(ROOT, "dist"), help="output directory (default: dist)")
+    parser.add_argument("--check", action="store_true", help="check that the built scripts behave as their source")
+    args = parser.parse_args(argv)
+    makedirs(args.output, exist_ok=True)
+    plain = tempfile.mkdtemp() if args.check else None
+    if plain:
+        for name in SHARED: shutil.copy(join(ROOT, name), plain)
+    failed = []
+    for language, catalog in catalogs().items():
+        build(language, catalog, args.output, plain)
+        report(language, catalog, args.output)
+        if plain:
+            for name in check(language, catalog, args.output, plain):
+                failed.append(name); print("  differs from its source on", name, file=sys.stderr)
+    if plain: shutil.rmtree(plain)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,488 +1,408 @@
 __version__ = "2026-01-05 T 13:05 UTC+1"
 
-from math import exp, log, log10, sin, asin, cos, acos, tan, atan, pi, sqrt
-from time import sleep, monotonic
-from random import random
+from sys import modules
+from time import monotonic
 
-from ion import keydown
 from kandinsky import draw_string, fill_rect
 
 from micropython import kbd_intr
 kbd_intr(-1)  # Disable KeyboardInterrupt
 
+from rpn_keys import wait_key, dispatch, flush
+from rpn_render import StackRenderer
+from rpn_session import Session
+
 
 # RPN AND PYTHON SPECIFIC FUNCTIONS
 
-def python_int(foo):
-    """Python-specific: keep integers instead of floats, if possible."""
-    foo = float(foo)
-    try: integer = int(foo)
-    except OverflowError as message: draw_error(message)
-    else:
-        if foo == integer:
-            foo = integer
-        return foo
-
-def python_trailing(value):
-    # Remove Python-specific trailing 000000001 if possible
-    if value.count(".") == 1 and (value[-1] == "1" or value[-1] == "2"):
-        zeros = 0; last = -2
-        while value[last] == "0": zeros += 1; last -= 1
-        if zeros >= 7: value = value[:last+1]
-    # Remove Python-specific trailing 9s if possible
-    if value.count(".") == 1 and value[-1] == "9":
-        nines = 0; last = -2
-        while value[last] == "9": nines += 1; last -= 1
-        if nines >= 7:
-            value = value[:last+1]
-            last_digit = int(value[-1]) + 1
-            value = value[:-1] + str(last_digit)
-    return value
-
-def drop():
-    stack.pop(0)
-    if fixed: stack.append(stack[2])
-
-def push(foo, history=True):
-    try: top = python_int(foo)
-    except Exception as message: draw_error(message)
-    else:
-        if history: global lastx; lastx = foo
-        stack.insert(0, top)
-    if fixed: stack.pop()
-
-def evaluate1(operation):
-    """Evaluate unary operations."""
-    global entry, stack, lastx
-    if not entry and stack:
-        try: result = operation(stack[0])
-        except Exception as message: draw_error(message)
-        else: lastx = stack[0]; stack[0] = python_int(result)
-    elif entry:
-        try: result = operation(float(entry))
-        except Exception as message: draw_error(message)
-        else: lastx = entry; stack.insert(0, python_int(result)); entry = ""
-        draw_command(0)
-    draw_stack(8, 0.2)
-
-def evaluate2(operation, refresh=True):
-    """Evaluate binary operations."""
-    global entry, stack, lastx
-    if not entry and len(stack) >= 2:
-        try: result = operation(stack[1], stack[0])
-        except Exception as message: draw_error(message)
-        else: lastx = stack[0]; stack[1] = python_int(result); drop()
-    elif entry and stack:
-        try: result = operation(stack[0], float(entry))
-        except Exception as message: draw_error(message)
-        else: lastx = entry; stack[0] = python_int(result); entry = ""
-    if refresh: display()
-
-
-# MATH FUNCTIONS
-
-def factorial(n):
-    if float(n) != int(n):
-        raise Exception("math domain error")
-    else:
-        prod = 1; max = n
-        while max > 0: prod *= max; max -= 1
-        return prod
-
-def hms(dec):
-    """Convert decimal time in hours to sexagesimal format."""
-    hours = int(dec)
-    minutes = int((dec - hours) * 60)
-    seconds = ((dec - hours) * 60 - minutes) * 60
-    return hours + minutes/100 + seconds/10000
-
-def prime_facto(n):
-    """Find the lowest prime divisor of a natural number n."""
-    if float(n) != int(n):
-        raise Exception("math domain error")
-    else:
-        div = 2
-        while div**2 <= n:
-            if n % div == 0: return div
-            div += 1
-        return 1
+def evaluate1(name):
+    """Evaluate the named unary operation, then refresh the stack."""
+    had_entry = engine.entry
+    report(engine.unary(name))
+    if had_entry: draw_command()
+    draw_stack()
+
+def evaluate2(name):
+    """Evaluate the named binary operation, then refresh the screen."""
+    report(engine.binary(name))
+    display()
 
 
 # GUI FUNCTIONS
 
-def draw_register(level, timeout=0, selected=False):
-    """Display the requested stack register on correct background and line height."""
-    if fixed:
-        height = 46; name = ("X:", "Y:", "Z:", "T:")
-    else:
-        height = 23; name = ("1:", "2:", "3:", "4:", "5:", "6:", "7:", "8:")
-    bg_color = (245,250,255) if level % 2 == 0 else (255,254,255)
-    bg_text = (214,213,231) if selected else bg_color
-    y_text = 185 - (level+1)*height + (height - 18) // 2
-    fill_rect(0, 184 - (level+1)*height, 320, height, bg_color)
-    draw_string(name[level], 10, y_text, (0,0,0), bg_color)
-    if fixed:
-        x = 40 if stack[level] >= 0 else 30
-        draw_string("{:.21f}".format(stack[level]), x, y_text, (0,0,0), bg_text)
-    else:
-        if stack[level] > 10**25:  # Scientific notation to keep numbers on screen
-            value = "{:.20e}".format(stack[level])
-        else:
-            value = python_trailing(str(stack[level]))
-        draw_string(value, 310 - 10*len(value), y_text, (0,0,0), bg_text)
-    sleep(timeout)
-
-def draw_stack(depth=8, timeout=0):
-    """Refresh the first {depth} stack levels from stack top."""
-    if fixed: depth = 4
-    if depth > len(stack): depth = len(stack)
-    for level in range(depth):
-        draw_register(level)
-    sleep(timeout)
-
-def draw_command(timeout=0.2):
-    """Refresh the command line, bottom of the screen."""
-    fill_rect(0, 185, 320, 37, (255,254,255))
-    draw_string(entry, 5, 195, (0,0,0), (255,254,255))
+def draw_stack(selected=-1):
+    """Refresh the stack levels that changed since the last frame, eventually with a selected level."""
+    renderer.render(engine.stack, engine.fixed, selected)
+
+def draw_command():
+    """Refresh the command line, bottom of the screen: only the characters from the first one that changed."""
+    global shown, cursor
+    entry = engine.entry
+    if shown is None: fill_rect(0, 185, 320, 37, (255,254,255)); shown = ""
+    i = 0; n = min(len(entry), len(shown))
+    while i < n and entry[i] == shown[i]: i += 1
+    if i < len(entry): draw_string(entry[i:], 5 + 10*i, 195, (0,0,0), (255,254,255))
+    if len(entry) < len(shown): fill_rect(5 + 10*len(entry), 195, 10*(len(shown) - len(entry)), 18, (255,254,255))
+    if cursor and cursor[0] >= i:  # Drawn over, unless after the last character of both texts
+        if cursor[1] and cursor[0] == len(shown) >= len(entry): erase_cursor(cursor[0])
+        cursor = None
+    shown = entry
     blink_cursor(True)
-    sleep(timeout)
 
 def display(command_line=True):
-    """Refresh the whole screen: background, all stack levels, separator, and command line."""
-    fill_rect(0, 0, 320, 184, (245,250,255))
-    # On fixed stack, drop oldest level if not displayable
-    levels = 4 if fixed else 8
-    if fixed and len(stack) > levels: stack.pop()
-    n = len(stack) if len(stack) < levels else levels
-    draw_stack(n)
+    """Refresh the screen: stack levels that changed, separator, and command line."""
+    draw_stack()
     fill_rect(0, 184, 320, 1, (223,217,222))
     if command_line: draw_command()
-    else: sleep(0.2)
 
-def blink_cursor(forced=False):
-    color = (0,0,0) if int(monotonic()) % 2 == 0 or forced else (255,254,255)
-    fill_rect(5 + 10*len(entry), 194, 1, 18, color)
+def invalidate():
+    """Draw again, on the next display(), what a dialog covered: the stack rows below its top, and the command line."""
+    global shown
+    renderer.damage(27, 195); shown = None
 
+def blink_cursor(forced=False):
+    """Draw the cursor of the command line on or off, only when its blink phase or its position changed."""
+    global cursor
+    on = forced or int(monotonic()) % 2 == 0
+    position = engine.cursor()
+    if cursor == (position, on): return
+    if cursor and cursor[1] and cursor[0] != position: erase_cursor(cursor[0])
+    if on: fill_rect(5 + 10*position, 195, 1, 18, (0,0,0))
+    else: erase_cursor(position)
+    cursor = (position, on)
+
+def idle():
+    """Blink the cursor, and write the session out once the keyboard has been idle for a while."""
+    blink_cursor(); session.idle()
+
+def erase_cursor(position):
+    """Draw the character under the cursor again, or the background after the last one."""
+    if position < len(shown): draw_string(shown[position], 5 + 10*position, 195, (0,0,0), (255,254,255))
+    else: fill_rect(5 + 10*position, 195, 1, 18, (255,254,255))
+
+shown = None  # Command line on screen, None to draw it all again
+cursor = None  # (position, shown) of the cursor on screen
+
+MESSAGES = {}  # Error message → translation, filled in by build.py for other languages
 
 def draw_error(text):
     """Display an error or exception in a black dialog box."""
-    fill_rect(144 - 5*len(str(text)), 89, 32 + 10*len(str(text)), 44, (0,0,0))
-    draw_string(str(text), 160 - 5*len(str(text)), 102, (255,254,255), (0,0,0))
-    sleep(0.5); pressed = False
-    while not pressed:
-        for i in range(53):
-            if keydown(i): pressed = True
-    display(False)
-
+    text = str(text); text = MESSAGES.get(text, text)
+    fill_rect(144 - 5*len(text), 89, 32 + 10*len(text), 44, (0,0,0))
+    draw_string(text, 160 - 5*len(text), 102, (255,254,255), (0,0,0))
+    flush(); wait_key()
+    renderer.damage(89, 44); display(False)
 
-def draw_item(line, items, descriptions, selected=False):
-    """Display a menu item line, eventually on a selected background."""
-    h = 174 // len(items)
-    bg_color = (214,213,231) if selected else (255,254,255)
-    fill_rect(28, 49 + h*line, 264, h - 1, bg_color)
-    draw_string(items[line], 35, 41 + h*line + h // 2, (0,0,0), bg_color)
-    draw_string(descriptions[line], 285 - 10*len(descriptions[line]), 41 + h*line + h // 2, (164,165,164), bg_color)
+def report(error):
+    """Display the error returned by an engine operation, if any."""
+    if error: draw_error(error)
 
-def draw_menu(items, descriptions):
-    """Display all items and descriptions menu inside a dialog box."""
-    fill_rect(27, 48, 266, 174, (238,238,238))
-    fill_rect(28, 49, 264, 173, (255,254,255))
-    h = 174 // len(items)
-    for i in range(len(items)):
-        draw_item(i, items, descriptions)
-        fill_rect(28, 48 + h*i, 264, 1, (238,238,238))
-    fill_rect(28, 48 + h*len(items), 264, 1, (238,238,238))
 
+def release(module):
+    """Forget a module imported on first use, so that its code leaves the heap until next time."""
+    del modules[module.__name__]
 
 def varbox():
-    """Display a dialog with functions mapped to ALPHA + some key."""
-    keys = ("D", "R", "C", "F", "H", "P", "?")
-    desc = ("Set angles to degrees", "Set angles to radians", "Convert °F to °C", "Convert °C to °F", "Convert hrs to h:min", "Prime factorisation", "Random number in [0,1)")
-    fill_rect(27, 27, 266, 21, (65,64,65))
-    fill_rect(28, 28, 264, 19, (108,99,115))
-    draw_string("Alpha shortcuts", 85, 28, (255,254,255), (108,99,115))
-    draw_menu(keys, desc)
-    sleep(0.5); pressed = False
-    while not pressed:
-        for i in (4, 5, 15):  # OK, BACK, VAR
-            if keydown(i): pressed = True
-    display()
-
+    """Display the ALPHA shortcuts dialog, loaded only while open."""
+    import rpn_menus
+    rpn_menus.varbox(); release(rpn_menus)
+    invalidate(); display()
 
 def toolbox():
-    """Display a dialog with common RPN functions and their mappings."""
-    keys = (" xnt", "  (", "  )", " Ans", "[shift]Ans", "[shift] ÷", "[shift] -")
-    desc = ("Fixed/dynamic stack", "ROLL (n)/all levels", "SWAP last two levels", "Copy last X value", "Copy 2nd level", "Inverse", "Change signs")
-    fill_rect(27, 27, 266, 21, (65,64,65))
-    fill_rect(28, 28, 264, 19, (108,99,115))
-    draw_string("Hotkeys", 125, 28, (255,254,255), (108,99,115))
-    draw_menu(keys, desc)
-    sleep(0.5); pressed = False
-    while not pressed:
-        for i in (4, 5, 16):  # OK, BACK, TOOLBOX
-            if keydown(i): pressed = True
-    display()
-
+    """Display the hotkeys dialog, loaded only while open."""
+    import rpn_menus
+    rpn_menus.toolbox(); release(rpn_menus)
+    invalidate(); display()
 
 def percentage():
-    """Display a dialog with common percentage functions."""
-    items = ("%", "Δ%", "%T", "±%", "MU%P")
-    descriptions = ("Percentage of X", "Percent difference", "Percent of total", "Evolution or markup", "Markup on price")
-    fill_rect(27, 27, 266, 21, (65,64,65))
-    fill_rect(28, 28, 264, 19, (108,99,115))
-    draw_string("Percentage", 110, 28, (255,254,255), (108,99,115))
-    draw_menu(items, descriptions)
-    line = 0; quit = False
-    draw_item(0, items, descriptions, True)
-    while not quit:
-        sleep(0.13)
-        if keydown(1) and line > 0:  # UP
-            draw_item(line, items, descriptions)
-            draw_item(line - 1, items, descriptions, True)
-            line -= 1
-        if keydown(2) and line < len(items) - 1:  # DOWN
-            draw_item(line, items, descriptions)
-            draw_item(line + 1, items, descriptions, True)
-            line += 1
-        if keydown(4) or keydown(52):  # OK/EXE
-            if line == 0:  # % Percentage of X
-                if entry and stack:
-                    base = stack[0]
-                    evaluate2(lambda x, y: x*y / 100, False)
-                    push(base, False)
-                    stack[0], stack[1] = stack[1], stack[0]
-                elif not entry and len(stack) >= 2:
-                    base = stack[1]
-                    evaluate2(lambda x, y: x*y / 100, False)
-                    push(base, False)
-                    stack[0], stack[1] = stack[1], stack[0]
-            elif line == 1:  # Δ% Percent difference
-                if entry and stack:
-                    base = stack[0]
-                    evaluate2(lambda x, y: (y-x) / x * 100, False)
-                    push(base, False)
-                    stack[0], stack[1] = stack[1], stack[0]
-                elif not entry and len(stack) >= 2:
-                    base = stack[1]
-                    evaluate2(lambda x, y: (y-x) / x * 100, False)
-                    push(base, False)
-                    stack[0], stack[1] = stack[1], stack[0]
-            elif line == 2:  # %T Percent of total
-                if entry and stack:
-                    base = stack[0]
-                    evaluate2(lambda x, y: y/x * 100, False)
-                    push(base, False)
-                    stack[0], stack[1] = stack[1], stack[0]
-                elif not entry and len(stack) >= 2:
-                    base = stack[1]
-                    evaluate2(lambda x, y: y/x * 100, False)
-                    push(base, False)
-                    stack[0], stack[1] = stack[1], stack[0]
-            elif line == 3:  # ±% Evolution, or markup on cost
-                evaluate2(lambda x, y: x + x*y / 100)
-            elif line == 4:  # MU%P Markup on price, or margin
-                evaluate2(lambda x, y: (y-x) / y * 100)
-            quit = True; display()
-        if keydown(5): quit = True; display()  # BACK
+    """Display the percentage functions dialog, loaded only while open, and evaluate the one chosen."""
+    import rpn_menus
+    name = rpn_menus.percentage(); release(rpn_menus)
+    if name: report(engine.binary(name))
+    invalidate(); display()
+
+def whole_stack():
+    """Display the whole-stack operations dialog, loaded only while open, and evaluate the one chosen."""
+    import rpn_menus
+    name = rpn_menus.whole_stack(); release(rpn_menus)
+    if name: report(engine.whole(name))
+    invalidate(); display()
 
 
 # MAIN PROGRAM
 
-# Original state: dynamic empty stack, no lastX, empty entry command line, angles in degrees
-fixed = False; stack = []
-lastx = ""; entry = ""
-degrees = True
+# Characters the user may enter on the command line
 
-display()
-while True:
+def type_char(char):
+    engine.type(char); draw_command()
 
-    # Characters the user may enter on the command line
-    if keydown(48): entry += "0"; draw_command()
-    elif keydown(42): entry += "1"; draw_command()
-    elif keydown(43): entry += "2"; draw_command()
-    elif keydown(44): entry += "3"; draw_command()
-    elif keydown(36): entry += "4"; draw_command()
-    elif keydown(37): entry += "5"; draw_command()
-    elif keydown(38): entry += "6"; draw_command()
-    elif keydown(30): entry += "7"; draw_command()
-    elif keydown(31): entry += "8"; draw_command()
-    elif keydown(32): entry += "9"; draw_command()
-    elif keydown(49):
-        if not entry: entry = "0."
-        else: entry += "."
-        draw_command()
-    elif keydown(50):
-        if not entry: entry = "1e"
-        else: entry += "e";
-        draw_command()
-    elif keydown(27):
-        if entry: push(entry); entry = ""; draw_command()
-        push(pi)
-        draw_stack(8, 0.2)
-
-    # RPN-specific
-    elif keydown(14):  # XNT
-        fixed = not fixed  # Switch between fixed or dynamic stack
-        if fixed:  # Max 4 levels, equal to 0 if not used
-            for level in range(4, len(stack)): stack.pop()
-            for level in range(4 - len(stack)): stack.append(0)
-        else:  # All levels should be empty if not used
-            while stack[len(stack) - 1] == 0:
-                stack.pop()
-                if stack == [0]: stack = []; break
-        display()
-    elif keydown(51):  # Ans
-        try:
-            if entry: stack.insert(0, python_int(entry)); entry = ""  # LastX
-        except Exception as message: draw_error(message)
-        else: push(lastx); display()
-    elif keydown(4) or keydown(52):  # OK/EXE
-        if entry: push(entry); entry = ""; display()  # ENTER
-        elif stack: push(stack[0]); draw_stack(8, 0.2)  # DUP
-    elif keydown(17):  # BACKSPACE
-        if not entry and stack: drop(); display(False)  # DROP stack top level
-        else: entry = entry[:-1]; draw_command()  # CLEAR last character on command line
-    elif keydown(33):  # (: (n) ROLL down
-        if entry:
-            try: pos = float(entry)
-            except Exception as message: draw_error(message)
-            else:
-                if pos == int(pos) and int(pos) <= len(stack):
-                    entry = ""; draw_command()
-                    stack.insert(int(pos-1), stack.pop(0))
-                    draw_stack(int(pos))
-                else:
-                    draw_error("invalid stack level number")
-        elif len(stack) >= 2: stack.append(stack.pop(0)); draw_stack(8, 0.2)
-    elif keydown(34):  # ): SWAP
-        if entry: push(entry); entry = ""
-        if len(stack) >= 2: stack[0], stack[1] = stack[1], stack[0]
-        draw_stack(2, 0.2)
-    elif keydown(1):  # UP: selection of levels if stack is dynamic
-        if not fixed and stack:
-            level = 0; draw_register(level, 0.2, True)
-            while level >= 0:
-                if keydown(1) and level < len(stack) - 1:  # UP
-                    draw_register(level)
-                    draw_register(level + 1, 0.2, True)
-                    level += 1
-                if keydown(2):  # DOWN
-                    draw_register(level)
-                    if level > 0: draw_register(level - 1, 0.2, True)
-                    level -= 1
-                if keydown(17):  # BACKSPACE: DROP
-                    stack = stack[level+1:]; level = -1
-                if keydown(4) or keydown(52):  # OK/EXE: PICK
-                    stack[0] = stack[level]; level = -1
-                if keydown(33):  # (: ROLL down
-                    stack.insert(int(level), stack.pop(0)); level = -1
-                if keydown(5): level = -1  # BACK: exit selection mode
-            display(False)
-
-    # Unary operators
-    elif keydown(18):
-        if not entry and not stack: push(exp(1)); draw_register(0, 0.2)
-        else: evaluate1(lambda x: exp(x))
-    elif keydown(19): evaluate1(lambda x: log(x))
-    elif keydown(20): evaluate1(lambda x: log10(x))
-    elif keydown(21): evaluate1(lambda x: 1/x)  # INVERSE
-    elif keydown(22): evaluate1(lambda x: -x)  # CHS
-    elif keydown(24):
-        if degrees: evaluate1(lambda x: sin(x * pi / 180))
-        else: evaluate1(lambda x: sin(x))
-    elif keydown(25):
-        if degrees: evaluate1(lambda x: cos(x * pi / 180))
-        else: evaluate1(lambda x: cos(x))
-    elif keydown(26):
-        if degrees: evaluate1(lambda x: tan(x * pi / 180))
-        else: evaluate1(lambda x: tan(x))
-    elif keydown(28): evaluate1(lambda x: sqrt(x))
-    elif keydown(29): evaluate1(lambda x: x*x)
-
-    # Binary operators
-    elif keydown(23): evaluate2(lambda x, y: x ** y)
-    elif keydown(39): evaluate2(lambda x, y: x * y)
-    elif keydown(40): evaluate2(lambda x, y: x / y)
-    elif keydown(45): evaluate2(lambda x, y: x + y)
-    elif keydown(46):
-        if entry and entry[-1] == "e" and entry.count("-") == 0: entry += "-"
-        else: evaluate2(lambda x, y: x - y)
-
-    # SHIFT operators
-    elif keydown(12):  # SHIFT
-        pressed = False; draw_string("shift", 270, 0, (255,254,255), (255,181,0)); sleep(0.2)
-        while not pressed:
-            if keydown(17):  # BACKSPACE: CLEAR
-                stack = [0, 0, 0, 0] if fixed else []
-                entry = ""; pressed = True; display()
-            if keydown(24):
-                if degrees: evaluate1(lambda x: asin(x) * 180 / pi)
-                else: evaluate1(lambda x: asin(x))
-                pressed = True
-            if keydown(25):
-                if degrees: evaluate1(lambda x: acos(x) * 180 / pi)
-                else: evaluate1(lambda x: acos(x))
-                pressed = True
-            if keydown(26):
-                if degrees: evaluate1(lambda x: atan(x) * 180 / pi)
-                else: evaluate1(lambda x: atan(x))
-                pressed = True
-            if keydown(33):  # (: ROLL up
-                if entry:
-                    try: pos = float(entry)
-                    except Exception as message: draw_error(message)
-                    else:
-                        entry = ""
-                        if pos == int(pos) and int(pos) <= len(stack):
-                            stack.insert(0, stack.pop(int(pos)-1))
-                        else: draw_error("invalid stack level number")
-                    display()
-                elif len(stack) >= 2: stack.insert(0, stack.pop())
-                pressed = True
-            if keydown(40): evaluate1(lambda x: 1/x); pressed = True  # DIVISION
-            if keydown(46): evaluate1(lambda x: -x); pressed = True  # MINUS
-            if keydown(51):  # Ans: OVER
-                if fixed or len(stack) >= 2: push(stack[1])
-                pressed = True
-            if keydown(12): pressed = True  # SHIFT
+def type_pi():
+    had_entry = engine.entry
+    report(engine.push_pi())
+    if had_entry: draw_command()
+    draw_stack()
+
+def cursor_left():  # LEFT: move the cursor of the command line
+    engine.cursor_left(); blink_cursor(True)
+
+def cursor_right():  # RIGHT
+    engine.cursor_right(); blink_cursor(True)
+
+
+# RPN-specific
+
+def fixed_dynamic():  # XNT
+    engine.toggle_fixed()  # Switch between fixed or dynamic stack
+    display()
+
+def last_x():  # Ans
+    report(engine.last_x()); display()
+
+def enter():  # OK/EXE
+    if engine.entry: report(engine.enter()); display()  # ENTER
+    elif engine.stack: report(engine.enter()); draw_stack()  # DUP
+
+def backspace():
+    if not engine.entry and engine.stack: engine.backspace(); display(False)  # DROP stack top level
+    else: engine.backspace(); draw_command()  # CLEAR last character on command line
+
+def roll_down():  # (: (n) ROLL down
+    if engine.entry:
+        error = engine.roll_down()
+        if error: draw_error(error)
+        else: draw_command(); draw_stack()
+    elif len(engine.stack) >= 2: engine.roll_down(); draw_stack()
+
+def swap():  # ): SWAP
+    report(engine.swap())
+    if not engine.entry: draw_command()
+    draw_stack()
+
+def undo():  # BACK: UNDO the last keystroke, [shift]BACK: REDO it
+    engine.undo(); display()
+
+def redo():
+    engine.redo(); display()
+
+def select_level():  # UP: selection of levels if stack is dynamic, scrolling past the rows shown
+    if not engine.fixed and engine.stack:
+        level = 0; typed = 0; draw_stack(level)
+        while level >= 0:
+            key = wait_key(SELECTION_KEYS)
+            depth = len(engine.stack); page = len(renderer.rows)
+            if key in DIGITS:  # Jump to level (n), as its digits are typed
+                typed = 10*typed + DIGITS[key]
+                if typed: level = min(typed, depth) - 1; draw_stack(level)
+                continue
+            typed = 0
+            if key == 1 and level < depth - 1:  # UP
+                level += 1; draw_stack(level)
+            elif key == 2:  # DOWN
+                level -= 1; draw_stack(level)
+            elif key == 45:  # +: page up
+                level = min(level + page, depth - 1); draw_stack(level)
+            elif key == 46:  # -: page down
+                level = max(level - page, 0); draw_stack(level)
+            elif key == 17:  # BACKSPACE: DROP
+                engine.drop_to(level); level = -1
+            elif key == 4 or key == 52:  # OK/EXE: PICK
+                engine.pick(level); level = -1
+            elif key == 33:  # (: ROLL down
+                engine.roll_to(level); level = -1
+            elif key == 5: level = -1  # BACK: exit selection mode
         display(False)
 
-    # ALPHA operators
-    elif keydown(13):  # ALPHA
-        pressed = False; draw_string("alpha", 270, 0, (255,254,255), (255,181,0)); sleep(0.2)
-        while not pressed:
-            if keydown(6):  # HOME
-                pressed = True; display(False); draw_error(__version__)
-            if keydown(17):  # %: Percentage functions
-                pressed = True; display(False); percentage()
-            if keydown(20):  # C: Fahrenheit to Celsius
-                evaluate1(lambda x: (x-32) * 5/9); pressed = True
-            if keydown(21):  # D: Set angles to degrees
-                degrees = True; pressed = True; display(False)
-            if keydown(23):  # F: Celsius to Fahrenheit
-                evaluate1(lambda x: x * 9/5 + 32); pressed = True
-            if keydown(25):  # H
-                evaluate1(lambda x: hms(x)); pressed = True
-            if keydown(33):  # P: Prime factorisation
-                if not entry and stack:
-                    try: push(prime_facto(float(stack[0])), False)
-                    except Exception as message: draw_error(message)
-                    display(False)
-                elif entry:
-                    if float(entry) != int(float(entry)): draw_error("math domain error")
-                    else: push(float(entry)); push(prime_facto(float(entry)), False); entry = ""
-                    display()
-                pressed = True
-            if keydown(36):  # R: Set angles to radians
-                degrees = False; pressed = True; display(False)
-            if keydown(48):  # ?
-                if not entry: push(random())
-                pressed = True; display(False)
-            if keydown(49): evaluate1(lambda x: factorial(x)); pressed = True
-            if keydown(13): pressed = True; display(False)  # ALPHA
-
-    elif keydown(16): toolbox()
-    elif keydown(15): varbox()
-    elif keydown(6): quit()  # HOME
-
-    blink_cursor()
+DIGITS = {48: 0, 42: 1, 43: 2, 44: 3, 36: 4, 37: 5, 38: 6, 30: 7, 31: 8, 32: 9}
+SELECTION_KEYS = (1, 2, 45, 46, 17, 4, 52, 33, 5) + tuple(DIGITS)
+
+# Unary operators
+
+def exponential():
+    if not engine.entry and not engine.stack: report(engine.push_e()); draw_stack()
+    else: evaluate1("exp")
+
+
+# Binary operators
+
+def minus():
+    if engine.can_type_sign(): type_char("-")
+    else: evaluate2("-")
+
+
+# SHIFT operators
+
+def clear():  # BACKSPACE: CLEAR
+    engine.clear(); display()
+
+def roll_up():  # (: ROLL up
+    if engine.entry: report(engine.roll_up()); display()
+    else: engine.roll_up()
+
+def shift():
+    draw_string("shift", 270, 0, (255,254,255), (255,181,0))
+    dispatch(SHIFT_KEYS)
+    renderer.damage(0, 18); display(False)
+
+
+# ALPHA operators
+
+def version():  # HOME
+    display(False); draw_error(__version__)
+
+def profile():  # BACK: Toggle the profiling overlay
+    import rpn_keys, rpn_profile
+    tables = (MAIN_KEYS, SHIFT_KEYS, ALPHA_KEYS)
+    if rpn_profile.running():
+        rpn_profile.stop(globals(), tables); rpn_keys.latency_hook = None
+        renderer.invalidate()
+    else:
+        rpn_profile.start(globals(), ("display", "draw_stack", "draw_command", "evaluate1", "evaluate2",
+            "draw_error", "select_level", "percentage", "toolbox", "varbox"), tables)
+        rpn_keys.latency_hook = draw_profile
+    display(False)
+
+def draw_profile(key, latency):
+    """Display the last key latency, the lowest free heap and the costliest functions over the stack."""
+    import rpn_keys, rpn_profile
+    lines = ["key {}: {:.1f} ms".format(key, 1000*latency) + ", scan {:.2f} ms".format(1000*rpn_keys.scan_time)]
+    free = rpn_profile.lowest_free()
+    if free is not None: lines[0] += ", heap {}".format(free)
+    for name, calls, seconds in rpn_profile.top():
+        lines.append("{} {}x {:.1f} ms".format(name, calls, 1000*seconds))
+    fill_rect(0, 0, 320, 18*len(lines), (0,0,0))
+    for i in range(len(lines)): draw_string(lines[i], 0, 18*i, (255,254,255), (0,0,0))
+    renderer.damage(0, 18*len(lines))
+
+def percentage_menu():  # %: Percentage functions
+    display(False); percentage()
+
+def set_degrees(value):  # D: Set angles to degrees, R: Set angles to radians
+    if value: engine.set_degrees()
+    else: engine.set_radians()
+    display(False)
+
+def number_mode(toggle):
+    """Switch the numbers of the stack, then show which ones are used."""
+    had_entry = engine.entry
+    error = toggle()
+    if had_entry: draw_command()
+    display(False)
+    numbers = engine.numbers
+    if error: draw_error(error)
+    elif not numbers: draw_error("floats")
+    elif numbers.__name__ == "rpn_decimal": draw_error("{} decimals".format(numbers.decimals))
+    elif numbers.as_fraction: draw_error("fractions n/d")
+    else: draw_error("fractions as decimals")
+
+def decimal_mode():  # E: Fixed-point decimals, (n) decimals, or floats
+    number_mode(engine.toggle_decimal)
+
+def fraction_mode():  # Q: Fractions shown as n/d, then as decimals, then floats
+    numbers = engine.numbers
+    if numbers and numbers.__name__ == "rpn_fraction" and numbers.as_fraction: number_mode(engine.toggle_fraction_view)
+    else: number_mode(engine.toggle_fraction)
+
+def prime_factorisation():  # P: Prime factorisation
+    if engine.entry or engine.stack:
+        had_entry = engine.entry
+        report(engine.prime_factorisation())
+        display(bool(had_entry))
+
+def record():  # M: Start or stop recording a keystroke program
+    import rpn_program
+    display(False)
+    if rpn_program.recording: draw_error("{} steps recorded".format(rpn_program.stop(engine)))
+    else: rpn_program.start(engine); draw_error("recording")
+
+def replay():  # N: Replay the keystroke program, (n) times
+    import rpn_program
+    if rpn_program.recording: rpn_program.stop(engine)
+    error, count, seconds = rpn_program.replay(engine)
+    display()  # Once, whatever the number of steps
+    if error: draw_error(error)
+    else: draw_error("{} ops in {} ms".format(count, int(1000*seconds)))
+
+def all_levels():  # A: Apply the next operation key to all levels
+    draw_string("all  ", 270, 0, (255,254,255), (255,181,0))
+    engine.all_levels()
+    dispatch(MAIN_KEYS)
+    engine.to_all = False  # If the key was no operation
+    renderer.damage(0, 18); display(False)
+
+def random_number():  # ?
+    report(engine.push_random()); display(False)
+
+def alpha():
+    draw_string("alpha", 270, 0, (255,254,255), (255,181,0))
+    renderer.damage(0, 18)
+    dispatch(ALPHA_KEYS)
+
+
+# Key → action tables, shared by the main loop and the SHIFT/ALPHA sub-loops
+MAIN_KEYS = {
+    48: lambda: type_char("0"), 42: lambda: type_char("1"), 43: lambda: type_char("2"),
+    44: lambda: type_char("3"), 36: lambda: type_char("4"), 37: lambda: type_char("5"),
+    38: lambda: type_char("6"), 30: lambda: type_char("7"), 31: lambda: type_char("8"),
+    32: lambda: type_char("9"), 49: lambda: type_char("."), 50: lambda: type_char("e"),
+    27: type_pi,
+    14: fixed_dynamic, 51: last_x, 4: enter, 52: enter, 17: backspace,
+    33: roll_down, 34: swap, 1: select_level, 5: undo, 0: cursor_left, 3: cursor_right,
+    18: exponential,
+    19: lambda: evaluate1("ln"),
+    20: lambda: evaluate1("log"),
+    21: lambda: evaluate1("inv"),  # INVERSE
+    22: lambda: evaluate1("chs"),  # CHS
+    24: lambda: evaluate1("sin"),
+    25: lambda: evaluate1("cos"),
+    26: lambda: evaluate1("tan"),
+    28: lambda: evaluate1("sqrt"),
+    29: lambda: evaluate1("sq"),
+    23: lambda: evaluate2("^"),
+    39: lambda: evaluate2("*"),
+    40: lambda: evaluate2("/"),
+    45: lambda: evaluate2("+"),
+    46: minus,
+    12: shift, 13: alpha, 16: lambda: toolbox(), 15: lambda: varbox(),
+    6: lambda: session.close() or quit(),  # HOME
+}
+SHIFT_KEYS = {
+    17: clear,
+    24: lambda: evaluate1("asin"),
+    25: lambda: evaluate1("acos"),
+    26: lambda: evaluate1("atan"),
+    33: roll_up,
+    40: lambda: evaluate1("inv"),  # DIVISION
+    46: lambda: evaluate1("chs"),  # MINUS
+    51: lambda: report(engine.over()),  # Ans: OVER
+    5: redo,
+    12: lambda: None,  # SHIFT
+}
+ALPHA_KEYS = {
+    6: version, 5: profile, 17: percentage_menu, 18: all_levels, 37: lambda: whole_stack(),
+    20: lambda: evaluate1("f>c"),  # C: Fahrenheit to Celsius
+    21: lambda: set_degrees(True),
+    22: decimal_mode,
+    23: lambda: evaluate1("c>f"),  # F: Celsius to Fahrenheit
+    25: lambda: evaluate1("hms"),  # H
+    30: record,
+    31: replay,
+    33: prime_factorisation,
+    34: fraction_mode,
+    36: lambda: set_degrees(False),
+    48: random_number,
+    49: lambda: evaluate1("fact"),
+    13: lambda: display(False),  # ALPHA
+}
+
+# State of the last session, or dynamic empty stack, no lastX, empty entry command line, angles in degrees
+session = Session()
+engine = session.resume()
+renderer = StackRenderer(fill_rect, draw_string)
+
+display()
+while True:
+    engine.begin()  # Each keystroke is an UNDO step
+    dispatch(MAIN_KEYS, idle)
+    engine.end()
+    session.save(engine)  # Journaled for the next start
+    renderer.end_operation()  # Draw counts of this operation in renderer.last
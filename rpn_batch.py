@@ -0,0 +1,92 @@
+"""Evaluate RPN tokens from files or stdin, and stream one result per input line.
+
+    python rpn_batch.py [--fixed] [--radians] [--stack] [--carry] [--program FILE] [--loops 1] [FILE ...]
+
+Tokens are separated by whitespace, and run with the same semantics as the keys
+of rpn.py: a number is typed on the command line, so that "3 roll" rolls the
+first 3 levels, and the command line is ENTERed at the end of each input line.
+Each line starts from an empty stack, or from the stack left by the last one with
+--carry. Lines are read one at a time, so memory does not depend on the input size.
+With --program, a keystroke program saved by rpn_program.save() is then replayed
+--loops times on each line's stack, and its throughput written apart.
+"""
+
+import sys
+from argparse import ArgumentParser
+from fileinput import input as read_lines
+from time import perf_counter
+
+from rpn_engine import RPNEngine
+from rpn_history import History
+
+
+def tokenize(lines):
+    """Yield (line number, tokens) for each non-empty line."""
+    for number, line in enumerate(lines, 1):
+        tokens = line.split()
+        if tokens: yield number, tokens
+
+def evaluate(engine, tokenized, errors, counter, replay=None, carry=False):
+    """Run each line of tokens on the engine, from an empty stack unless {carry}, then {replay}(engine)
+    if given, and yield the resulting stack.
+
+    Modes are kept from line to line. The tokens of a line are only recorded for UNDO when it uses
+    undo or redo. {counter} holds the numbers of operations and errors, written to {errors}, then of
+    steps replayed and their seconds.
+    """
+    for number, tokens in tokenized:
+        if not carry: engine.clear(); engine.lastx = ""; engine.history = History()
+        step = engine.begin if "undo" in tokens or "redo" in tokens else None
+        for token in tokens:
+            if step: step(); error = engine.run(token); engine.end()  # One token, one UNDO step
+            else: error = engine.run(token)
+            counter[0] += 1
+            if error:
+                counter[1] += 1
+                errors.write("line {}: {}: {}\n".format(number, token, error))
+        error = engine.push_entry()
+        if error:
+            counter[1] += 1
+            errors.write("line {}: {}\n".format(number, error))
+        if replay:
+            error, count, seconds = replay(engine)
+            counter[2] += count; counter[3] += seconds
+            if error:
+                counter[1] += 1
+                errors.write("line {}: program: {}\n".format(number, error))
+        yield engine.stack
+
+def main(argv=None):
+    parser = ArgumentParser(description="Evaluate RPN tokens from files or stdin.")
+    parser.add_argument("files", nargs="*", help="token files, stdin if none or '-'")
+    parser.add_argument("--fixed", action="store_true", help="fixed XYZT stack")
+    parser.add_argument("--radians", action="store_true", help="angles in radians")
+    parser.add_argument("--stack", action="store_true", help="write the whole stack, not only X")
+    parser.add_argument("--carry", action="store_true", help="keep the stack from one line to the next")
+    parser.add_argument("--program", help="keystroke program replayed on each line")
+    parser.add_argument("--loops", type=int, default=1, help="replays of the program per line")
+    args = parser.parse_args(argv)
+
+    if hasattr(sys, "set_int_max_str_digits"): sys.set_int_max_str_digits(0)  # Exact factorials
+    engine = RPNEngine(args.fixed, not args.radians)
+    replay = None
+    if args.program:
+        import rpn_program
+        rpn_program.load(args.program)
+        replay = lambda engine: rpn_program.replay(engine, args.loops)
+    counter = [0, 0, 0, 0]; start = perf_counter()
+    lines = read_lines(args.files or ("-",), openhook=lambda path, mode: open(path, encoding="utf-8"))
+    for stack in evaluate(engine, tokenize(lines), sys.stderr, counter, replay, args.carry):
+        if args.stack: sys.stdout.write(" ".join(str(stack[level]) for level in range(len(stack) - 1, -1, -1)) + "\n")
+        else: sys.stdout.write((str(stack[0]) if stack else "") + "\n")
+    elapsed = perf_counter() - start
+    rate = counter[0] / elapsed if elapsed else 0
+    sys.stderr.write("{} ops in {:.3f} s: {:.0f} ops/s\n".format(counter[0], elapsed, rate))
+    if replay:
+        rate = counter[2] / counter[3] if counter[3] else 0
+        sys.stderr.write("{} steps replayed in {:.3f} s: {:.0f} steps/s\n".format(counter[2], counter[3], rate))
+    return 1 if counter[1] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,359 @@
+from rpn_engine import UNARY, factorial
+from rpn_format import plain
+
+
+# FIXED-POINT DECIMALS
+#
+# In decimal mode, stack values are Decimal numbers: a big integer n standing for
+# n / 10**scale, rounded half away from zero to the number of decimals chosen by
+# the user, so that the 21 decimals of the fixed XYZT display are all exact.
+# Functions work on integers scaled by 10**w, w having GUARD more decimals: Newton's
+# iteration for square roots, and power series after argument reduction for exp,
+# ln, sin, cos, tan and atan. Division is the integer division of Python, exact and
+# faster than a Newton reciprocal for numbers of a few dozen digits.
+
+decimals = 25  # Decimals kept, set with (n) [alpha]+[E]
+GUARD = 10  # More decimals for the functions, lost in rounding errors of their series
+MAX_DIGITS = 1000  # Integer digits above which a result is out of range
+
+constants = {}  # Name: (w, constant scaled by 10**w), for the highest w so far
+
+
+def rounded_div(a, b):
+    """Return a / b rounded to the nearest integer, halves away from zero."""
+    if b < 0: a = -a; b = -b
+    q, r = divmod(a, b)
+    if 2*r > b or 2*r == b and a >= 0: q += 1
+    return q
+
+def rescale(n, scale, to):
+    """Return n / 10**scale as an integer scaled by 10**to, rounded."""
+    if to >= scale: return n * 10**(to - scale)
+    return rounded_div(n, 10**(scale - to))
+
+def isqrt(n):
+    """Return the integer square root of n, by Newton's iteration from above."""
+    if n < 0: raise ValueError("math domain error")
+    if n < 2: return n
+    x = 10 ** ((len(str(n)) + 1) // 2)
+    while True:
+        y = (x + n // x) // 2
+        if y >= x: return x
+        x = y
+
+
+# CONSTANTS AND KERNELS, on integers scaled by 10**w
+
+def constant(name, w):
+    """Return ln 2 or π scaled by 10**w, rounded from the most precise value computed so far."""
+    if name not in constants or constants[name][0] < w:
+        one = 10**(w + 5)  # Series terms are truncated
+        if name == "ln2": value = 2 * atanh_inverse(3, one)  # ln 2 = 2 atanh(1/3)
+        else: value = 16 * atan_inverse(5, one) - 4 * atan_inverse(239, one)  # Machin
+        constants[name] = (w + 5, value)
+    known, value = constants[name]
+    return rounded_div(value, 10**(known - w))
+
+def atanh_inverse(k, one):
+    total = 0; term = one // k; i = 1
+    while term: total += term // i; term //= k*k; i += 2
+    return total
+
+def atan_inverse(k, one):
+    total = 0; term = one // k; i = 1
+    while term: total += term // i if i % 4 == 1 else -(term // i); term //= k*k; i += 2
+    return total
+
+def exp_fixed(x, w):
+    """exp(x) = 2**k exp(r), with |r| <= ln(2)/2, and as many more decimals as 2**k has digits."""
+    k = rounded_div(x, constant("ln2", w))
+    if 3*k > 10*MAX_DIGITS: raise OverflowError("math range error")
+    extra = max(0, 3*k // 10 + 1)
+    one = 10**(w + extra)
+    r = x * 10**extra - k * constant("ln2", w + extra)
+    total = term = one; i = 1
+    while term: term = rounded_div(term * r, one * i); total += term; i += 1
+    return rounded_div(total << k if k >= 0 else total, 10**extra << max(0, -k))
+
+def ln_fixed(x, w):
+    """ln(x) = k ln(2) + 2 atanh((y-1)/(y+1)), with x = 2**k y and 1 <= y < 2."""
+    if x <= 0: raise ValueError("math domain error")
+    one = 10**w
+    k = int((len(str(x)) - 1 - w) * 3.321928)  # About log2(x)
+    y = x >> k if k >= 0 else x << -k
+    while y >= 2*one: y >>= 1; k += 1
+    while y < one: y <<= 1; k -= 1
+    z = rounded_div((y - one) * one, y + one); z2 = rounded_div(z*z, one)
+    total = 0; term = z; i = 1
+    while term: total += term // i; term = term * z2 // one; i += 2
+    return 2*total + k * constant("ln2", w)
+
+def log_fixed(x, w):
+    return rounded_div(ln_fixed(x, w) * 10**w, ln_fixed(10 * 10**w, w))
+
+def sqrt_fixed(x, w):
+    return isqrt(x * 10**w)
+
+def reduce_angle(x, w):
+    """Return x - 2kπ, between -π and π, with as many more digits of π as x has integer digits."""
+    extra = max(0, len(str(abs(x))) - w)
+    x *= 10**extra; two_pi = 2 * constant("pi", w + extra)
+    return rounded_div(x - rounded_div(x, two_pi) * two_pi, 10**extra)
+
+def series(term, r, n, one):
+    """Sum the terms of the sine (n = 1) or cosine (n = 0) series."""
+    total = 0; r2 = rounded_div(r*r, one)
+    while term: total += term; term = rounded_div(-term * r2, one * (n+1) * (n+2)); n += 2
+    return total
+
+def sin_fixed(x, w):
+    r = reduce_angle(x, w)
+    return series(r, r, 1, 10**w)
+
+def cos_fixed(x, w):
+    r = reduce_angle(x, w)
+    return series(10**w, r, 0, 10**w)
+
+def tan_fixed(x, w):
+    r = reduce_angle(x, w); one = 10**w
+    c = series(one, r, 0, one)
+    if not c: raise ValueError("math domain error")
+    return rounded_div(series(r, r, 1, one) * one, c)
+
+def atan_fixed(x, w):
+    """atan(x) = ±π/2 - atan(1/x) above 1, and 2 atan(x / (1 + sqrt(1 + x²))) until x < 1/8."""
+    one = 10**w
+    if abs(x) > one:
+        quarter = constant("pi", w) // 2
+        return (quarter if x > 0 else -quarter) - atan_fixed(rounded_div(one*one, x), w)
+    halvings = 0
+    while 8 * abs(x) > one: x = rounded_div(x * one, one + isqrt(one*one + x*x)); halvings += 1
+    x2 = rounded_div(x*x, one); total = 0; term = x; i = 1
+    while term: total += rounded_div(term, i); term = rounded_div(-term * x2, one); i += 2
+    return total << halvings
+
+def asin_fixed(x, w):
+    one = 10**w
+    if abs(x) > one: raise ValueError("math domain error")
+    if abs(x) == one: return constant("pi", w) // 2 * (1 if x > 0 else -1)
+    return atan_fixed(rounded_div(x * one, isqrt(one*one - x*x)), w)
+
+def acos_fixed(x, w):
+    return constant("pi", w) // 2 - asin_fixed(x, w)
+
+def radians(x, w):
+    """Convert x° to radians, reducing it modulo 360° exactly first."""
+    return rounded_div(x % (360 * 10**w) * constant("pi", w), 180 * 10**w)
+
+def tan_degrees(x, w):
+    """tan(x°), out of the domain on exact odd multiples of 90°."""
+    if x % (180 * 10**w) == 90 * 10**w: raise ValueError("math domain error")
+    return tan_fixed(radians(x, w), w)
+
+def angle_in_degrees(kernel):
+    return lambda x, w: kernel(radians(x, w), w)
+
+def angle_out_degrees(kernel):
+    return lambda x, w: rounded_div(kernel(x, w) * 180 * 10**w, constant("pi", w))
+
+
+# DECIMAL NUMBERS
+
+class Decimal:
+    """Fixed-point number: the integer n stands for n / 10**scale."""
+
+    def __init__(self, n, scale):
+        self.n = n; self.scale = scale
+
+    def split(self):
+        """Return the sign, significant digits and decimal exponent, as rpn_format.split()."""
+        if not self.n: return "", "0", 0
+        digits = str(abs(self.n))
+        return "-" if self.n < 0 else "", digits.rstrip("0"), len(digits) - 1 - self.scale
+
+    def __str__(self):
+        return plain(*self.split())
+
+    __repr__ = __str__
+
+    def __float__(self):
+        return self.n / 10**self.scale
+
+    def __int__(self):
+        q = abs(self.n) // 10**self.scale
+        return q if self.n >= 0 else -q
+
+    def __bool__(self):
+        return self.n != 0
+
+    def __hash__(self):
+        return hash(self.split())
+
+    def __neg__(self):
+        return Decimal(-self.n, self.scale)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return Decimal(abs(self.n), self.scale)
+
+    def pair(self, other):
+        """Return both numbers as integers scaled to the current decimals."""
+        other = to_decimal(other)
+        return rescale(self.n, self.scale, decimals), rescale(other.n, other.scale, decimals)
+
+    def __add__(self, other):
+        a, b = self.pair(other)
+        return Decimal(a + b, decimals)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        a, b = self.pair(other)
+        return Decimal(a - b, decimals)
+
+    def __rsub__(self, other):
+        a, b = self.pair(other)
+        return Decimal(b - a, decimals)
+
+    def __mul__(self, other):
+        other = to_decimal(other)
+        return Decimal(rescale(self.n * other.n, self.scale + other.scale, decimals), decimals)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        return divide(self, to_decimal(other))
+
+    def __rtruediv__(self, other):
+        return divide(to_decimal(other), self)
+
+    def __pow__(self, other):
+        return power(self, to_decimal(other))
+
+    def __rpow__(self, other):
+        return power(to_decimal(other), self)
+
+    def compare(self, other):
+        other = to_decimal(other); scale = max(self.scale, other.scale)
+        a = rescale(self.n, self.scale, scale); b = rescale(other.n, other.scale, scale)
+        return (a > b) - (a < b)
+
+    def __eq__(self, other):
+        try: return self.compare(other) == 0
+        except (TypeError, ValueError, OverflowError): return False
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __lt__(self, other):
+        return self.compare(other) < 0
+
+    def __le__(self, other):
+        return self.compare(other) <= 0
+
+    def __gt__(self, other):
+        return self.compare(other) > 0
+
+    def __ge__(self, other):
+        return self.compare(other) >= 0
+
+
+def parse(text):
+    """Return the Decimal written in a text like "-1.25e-3", rounded to the current decimals."""
+    if text in ("inf", "-inf"): raise OverflowError("math range error")
+    mantissa, e, exponent = text.lower().partition("e")
+    whole, point, fraction = mantissa.lstrip("+-").partition(".")
+    if not (whole + fraction).isdigit(): raise ValueError("invalid syntax for number")
+    try: exponent = int(exponent) if e else 0
+    except ValueError: raise ValueError("invalid syntax for number")
+    n = int(whole + fraction)
+    if mantissa.startswith("-"): n = -n
+    return scaled(n, exponent - len(fraction))
+
+def scaled(n, exponent):
+    """Return the Decimal n * 10**exponent, rounded to the current decimals."""
+    size = len(str(abs(n))) + exponent  # Digits before the point
+    if size > MAX_DIGITS: raise OverflowError("math range error")
+    if size < -decimals - 1: return Decimal(0, decimals)  # Rounded to 0
+    return Decimal(rescale(n, -exponent, decimals), decimals)
+
+def to_decimal(x):
+    """Return a number, or a number written in a string, as a Decimal."""
+    if isinstance(x, Decimal): return x
+    if isinstance(x, int): return Decimal(x * 10**decimals, decimals)
+    if isinstance(x, float): return parse(repr(x))  # The shortest decimal of the float
+    if isinstance(x, str): return parse(x)
+    raise TypeError("unsupported operand")
+
+def to_float(x):
+    """Return a Decimal as an int if it is one, or as a float."""
+    if not isinstance(x, Decimal): return x
+    if x.n % 10**x.scale == 0: return x.n // 10**x.scale
+    return float(x)
+
+def divide(x, y):
+    if not y.n: raise ZeroDivisionError("divide by zero")
+    shift = decimals + y.scale - x.scale
+    if shift >= 0: return Decimal(rounded_div(x.n * 10**shift, y.n), decimals)
+    return Decimal(rounded_div(x.n, y.n * 10**-shift), decimals)
+
+def power(x, y):
+    """x**y: exact for integer y, rounded once, or exp(y ln(x))."""
+    if y.n % 10**y.scale == 0:
+        exponent = int(y)
+        if not x.n:
+            if exponent < 0: raise ZeroDivisionError("divide by zero")
+            return Decimal(0 if exponent else 10**decimals, decimals)
+        if (len(str(abs(x.n))) - x.scale) * exponent > MAX_DIGITS: raise OverflowError("math range error")
+        if len(str(abs(x.n))) * abs(exponent) <= 4 * MAX_DIGITS:
+            exact = Decimal(x.n ** abs(exponent), x.scale * abs(exponent))
+            return divide(to_decimal(1), exact) if exponent < 0 else Decimal(rescale(exact.n, exact.scale, decimals), decimals)
+        return exp_ln(abs(x), y) * (-1 if x.n < 0 and exponent % 2 else 1)
+    if x.n <= 0:
+        if not x.n and y.n > 0: return Decimal(0, decimals)
+        raise ValueError("math domain error")
+    return exp_ln(x, y)
+
+def exp_ln(x, y):
+    """exp(y ln(x)) for x > 0, with as many more decimals as the result has integer digits."""
+    extra = max(0, int(float(y) * (len(str(x.n)) - x.scale)) + 2)
+    if extra > 2 * MAX_DIGITS: raise OverflowError("math range error")
+    w = decimals + GUARD + extra
+    t = rounded_div(ln_fixed(rescale(x.n, x.scale, w), w) * rescale(y.n, y.scale, w), 10**w)
+    return Decimal(rescale(exp_fixed(t, w), w, decimals), decimals)
+
+def decimal_function(kernel):
+    """Make a function of Decimal numbers from a kernel on integers scaled by 10**w."""
+    def function(x):
+        x = to_decimal(x); w = decimals + GUARD
+        return Decimal(rescale(kernel(rescale(x.n, x.scale, w), w), w, decimals), decimals)
+    return function
+
+def pi():
+    return Decimal(rescale(constant("pi", decimals + GUARD), decimals + GUARD, decimals), decimals)
+
+def e():
+    return decimal_function(exp_fixed)(1)
+
+
+# NAMED OPERATIONS, replacing those on floats
+
+KERNELS = {"exp": exp_fixed, "ln": ln_fixed, "log": log_fixed, "sqrt": sqrt_fixed}
+ANGLE_IN = {"sin": sin_fixed, "cos": cos_fixed, "tan": tan_fixed}  # Angle argument
+ANGLE_OUT = {"asin": asin_fixed, "acos": acos_fixed, "atan": atan_fixed}  # Angle result
+
+def unary_table(degrees):
+    """Build all unary operations on Decimal numbers once, with angles in degrees or radians."""
+    table = dict(UNARY)
+    for name in KERNELS: table[name] = decimal_function(KERNELS[name])
+    for name in ANGLE_IN: table[name] = decimal_function(angle_in_degrees(ANGLE_IN[name]) if degrees else ANGLE_IN[name])
+    if degrees: table["tan"] = decimal_function(tan_degrees)
+    for name in ANGLE_OUT: table[name] = decimal_function(angle_out_degrees(ANGLE_OUT[name]) if degrees else ANGLE_OUT[name])
+    table["inv"] = lambda x: divide(to_decimal(1), to_decimal(x))
+    table["fact"] = lambda x: factorial(int(x) if x == int(x) else float(x))  # Gamma in floats
+    return table
+
+UNARY_TABLES = (unary_table(False), unary_table(True))  # Radians, degrees
+convert = to_decimal  # Results, as rpn_fraction.convert()
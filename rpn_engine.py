@@ -0,0 +1,631 @@
+from math import exp, log, log10, sin, asin, cos, acos, tan, atan, pi, sqrt
+from random import random
+
+try: from gc import collect, mem_free
+except ImportError: mem_free = None  # CPython: the heap is the computer's memory
+
+from rpn_history import History, RECORD_BYTES
+from rpn_stack import DynamicStack, FixedStack
+
+
+# RPN AND PYTHON SPECIFIC FUNCTIONS
+
+def python_int(foo):
+    """Python-specific: keep integers instead of floats, if possible."""
+    if isinstance(foo, int): return foo
+    if isinstance(foo, str) and foo.isdigit(): return int(foo)  # Exact, even above 2**53
+    foo = float(foo)
+    integer = int(foo)
+    if foo == integer:
+        foo = integer
+    return foo
+
+def renumbered(value, old, numbers):
+    """Return a number of the {old} module (or a float) as a number of {numbers} (or a float)."""
+    if old is numbers and hasattr(value, "scale"): return numbers.scaled(value.n, -value.scale)  # Decimals rescaled, not through floats
+    if old: value = old.to_float(value)
+    return numbers.convert(value) if numbers else value
+
+
+# COMMAND LINE NUMBERS
+#
+# The number of the command line is scanned as it is typed, a character at a time,
+# into a state: (phase, mantissa digits, digits after the point, exponent digits,
+# sign of the exponent). Phases: 0 empty, 1 digits, 2 point alone, 3 digits and
+# point, 4 "e", 5 "e-", 6 exponent digits; only 1, 3 and 6 end a number. Operands
+# are then read from the state, without parsing the text: floats by a single
+# rounding, while mantissa and power of ten are both exact. Other command lines,
+# like "inf" from rpn_batch, are parsed.
+
+EMPTY = (0, 0, 0, 0, 1)
+COMPLETE = (1, 3, 6)
+POWERS = tuple(float(10**k) for k in range(23))  # Exact powers of ten as floats
+
+def scan(state, char):
+    """Return the state of a command line after one more character, or None if not a plain number."""
+    phase, m, d, x, s = state
+    if "0" <= char <= "9":
+        k = ord(char) - 48
+        if phase < 2: return (1, 10*m + k, d, x, s)
+        if phase < 4: return (3, 10*m + k, d + 1, x, s)
+        return (6, m, d, 10*x + k, s)
+    if char == "." and phase < 2: return (3 if phase else 2, m, d, x, s)
+    if char in "eE" and phase in (1, 3): return (4, m, d, x, s)
+    if char in "-+" and phase == 4: return (5, m, d, x, -1 if char == "-" else 1)
+
+def scanned(text, state=EMPTY):
+    """Return the state after the characters of a text, or None if not a plain number."""
+    for char in text:
+        state = scan(state, char)
+        if state is None: return
+    return state
+
+def scaled_float(m, exponent):
+    """Return the float of m * 10**exponent, rounded once as float() does, or None beyond exact operands."""
+    if not exponent: return float(m)
+    if m < 2**53 and -22 <= exponent <= 22:
+        return float(m) * POWERS[exponent] if exponent > 0 else float(m) / POWERS[-exponent]
+
+
+# HEAP WATCHDOG
+#
+# Big integers can fill the Python heap, and a MemoryError would end the script and
+# lose the stack: the stack stops growing before, after one warning.
+
+HEAP_WARNING = 8192  # Free bytes below which the next push is refused once, as a warning
+HEAP_RESERVE = 4096  # Free bytes kept for drawing and recovering: no push at all
+
+def heap_free():
+    """Return the free heap in bytes, collecting garbage first if it looks low, or None if unknown."""
+    if not mem_free: return None
+    free = mem_free()
+    if free < HEAP_WARNING: collect(); free = mem_free()
+    return free
+
+
+# MATH FUNCTIONS
+
+def hms(dec):
+    """Convert decimal time in hours to sexagesimal format."""
+    hours = int(dec)
+    minutes = int((dec - hours) * 60)
+    seconds = ((dec - hours) * 60 - minutes) * 60
+    return hours + minutes/100 + seconds/10000
+
+def factorial(x):
+    """Return x!, exact for natural numbers, or gamma(x + 1)."""
+    from rpn_factorial import factorial  # Loaded on first use only
+    return factorial(x)
+
+
+# NAMED OPERATIONS, shared by the keys and the batch evaluator
+
+UNARY = {
+    "exp": exp, "ln": log, "log": log10, "sqrt": sqrt,
+    "sq": lambda x: x*x,
+    "inv": lambda x: 1/x,
+    "chs": lambda x: -x,
+    "f>c": lambda x: (x-32) * 5/9,  # Fahrenheit to Celsius
+    "c>f": lambda x: x * 9/5 + 32,  # Celsius to Fahrenheit
+    "hms": hms, "fact": factorial,
+}
+ANGLE_IN = {"sin": sin, "cos": cos, "tan": tan}  # Angle argument
+ANGLE_OUT = {"asin": asin, "acos": acos, "atan": atan}  # Angle result
+
+def angle_in_degrees(function):
+    return lambda x: function(x * pi / 180)
+
+def angle_out_degrees(function):
+    return lambda x: function(x) * 180 / pi
+
+def unary_table(degrees):
+    """Build all unary operations once, with angles in degrees or radians: keys then allocate no closure."""
+    table = dict(UNARY)
+    for name in ANGLE_IN: table[name] = angle_in_degrees(ANGLE_IN[name]) if degrees else ANGLE_IN[name]
+    for name in ANGLE_OUT: table[name] = angle_out_degrees(ANGLE_OUT[name]) if degrees else ANGLE_OUT[name]
+    return table
+
+UNARY_DEGREES = unary_table(True)
+UNARY_RADIANS = unary_table(False)
+BINARY = {
+    "+": lambda x, y: x + y,
+    "-": lambda x, y: x - y,
+    "*": lambda x, y: x * y,
+    "/": lambda x, y: x / y,
+    "^": lambda x, y: x ** y,
+    "±%": lambda x, y: x + x*y / 100,  # Evolution, or markup on cost
+    "MU%P": lambda x, y: (y-x) / y * 100,  # Markup on price, or margin
+}
+PERCENT = {  # Binary operations keeping their base in Y
+    "%": lambda x, y: x*y / 100,  # Percentage of X
+    "Δ%": lambda x, y: (y-x) / x * 100,  # Percent difference
+    "%T": lambda x, y: y/x * 100,  # Percent of total
+}
+COMMANDS = {  # Stack commands: the command line is ENTERed first, unless used as argument
+    "enter": "enter", "swap": "swap", "roll": "roll_down", "rollup": "roll_up",
+    "lastx": "last_x", "clear": "clear", "pi": "push_pi", "pf": "prime_factorisation", "pfe": "prime_exponents",
+    "dup": "dup", "drop": "drop_x", "over": "over_x", "e": "push_e", "rand": "rand",
+    "deg": "set_degrees", "rad": "set_radians", "fixed": "set_fixed", "dynamic": "set_dynamic",
+    "decimal": "toggle_decimal", "frac": "toggle_fraction", "a/b": "toggle_fraction_view",
+    "undo": "undo", "redo": "redo", "all": "all_levels",
+}
+WHOLE = ("sum", "prod", "mean", "min", "max", "sort", "rev")  # Operations on all levels, in rpn_vector
+
+
+# RPN ENGINE
+
+class RPNEngine:
+    """Stack, LastX, command line entry and modes of the calculator, without any display.
+
+    Operations return None on success, or the error (exception or message) to report:
+    they never draw, so the engine runs on any Python, with or without ion/kandinsky.
+    """
+
+    def __init__(self, fixed=False, degrees=True):
+        self.fixed = fixed
+        self.stack = FixedStack() if fixed else DynamicStack()
+        self.lastx = ""; self.entry = ""
+        self.edit = ("", 0)  # Command line and the position of its cursor
+        self.typed = ("", EMPTY)  # Command line and the state of its number, scanned as typed
+        self.numbers = None  # Module of the numbers used instead of floats: rpn_decimal or rpn_fraction
+        self.convert = python_int; self.parse = float  # Conversions of results, and of the command line
+        self.unary_tables = (UNARY_RADIANS, UNARY_DEGREES)
+        self.degrees = degrees
+        self.warned = False  # Whether the low heap warning was shown
+        self.history = History(); self.step = None  # UNDO records, and the keystroke being recorded
+        self.change = None  # Record of the last keystroke, or the one an UNDO or REDO kept, None if nothing changed
+        self.to_all = False  # Whether the next unary or binary operation applies to all levels
+
+    # Stack primitives
+
+    def can_grow(self):
+        """Return the error if the heap is too low for one more stack level."""
+        free = heap_free()
+        if free is None or self.fixed: return
+        if free < HEAP_WARNING and self.history.forget(): free = heap_free()  # UNDO records go first
+        if free < HEAP_RESERVE: return "memory full"
+        if free >= HEAP_WARNING: self.warned = False
+        elif not self.warned: self.warned = True; return "low memory"
+
+    def push(self, foo, history=True):
+        try: top = self.convert(foo)
+        except Exception as message: return message
+        error = self.can_grow()
+        if error: return error
+        if history: self.lastx = foo
+        self.stack.push(top)
+
+    def drop(self):
+        self.stack.pop()
+
+    def push_entry(self):
+        """Push the command line on the stack, if any."""
+        if self.entry:
+            n = self.digits()
+            if n is None:
+                try: n = self.entry_value()
+                except Exception as message: return message
+            error = self.push(n, False)
+            if error: return error
+            self.lastx = self.entry; self.entry = ""
+
+    @property
+    def degrees(self):
+        return self.unary_table is self.unary_tables[1]
+
+    @degrees.setter
+    def degrees(self, degrees):
+        """Swap the unary operations table, only when the angle mode changes."""
+        self.unary_table = self.unary_tables[1 if degrees else 0]
+
+    # Command line
+    #
+    # The cursor position and the scanned number are kept with the command line they
+    # belong to: any other command line, entered, undone or cleared, has its cursor
+    # at its end, and is scanned on first use.
+
+    def cursor(self):
+        """Return the position of the cursor in the command line."""
+        edit = self.edit
+        return edit[1] if edit[0] is self.entry else len(self.entry)
+
+    def move_cursor(self, step):
+        self.edit = (self.entry, max(0, min(len(self.entry), self.cursor() + step)))
+
+    def cursor_left(self): self.move_cursor(-1)
+
+    def cursor_right(self): self.move_cursor(1)
+
+    def number(self):
+        """Return the state of the number of the command line, kept up to date as it is typed, or None."""
+        typed = self.typed
+        if typed[0] is not self.entry: self.typed = typed = (self.entry, scanned(self.entry))
+        return typed[1]
+
+    def digits(self):
+        """Return the integer of a command line of digits only, or None."""
+        state = self.number()
+        return state[1] if state and state[0] == 1 else None
+
+    def edited(self, entry, cursor, state):
+        """Set the command line edited, with the new cursor position, and the state of its number."""
+        self.entry = entry; self.edit = (entry, cursor); self.typed = (entry, state)
+
+    def type(self, chars):
+        """Insert characters at the cursor of the command line, as typed one by one."""
+        entry = self.entry; i = self.cursor()
+        if not entry and chars[0] == ".": chars = "0" + chars
+        elif not entry and chars[0] == "e": chars = "1" + chars
+        new = entry[:i] + chars + entry[i:]
+        state = self.number()
+        if state and i == len(entry): state = scanned(chars, state)  # Appended: only the new characters are scanned
+        else: state = scanned(new)
+        self.edited(new, i + len(chars), state)
+
+    def delete(self):
+        """Delete the character before the cursor of the command line."""
+        entry = self.entry; i = self.cursor()
+        if not i: return
+        entry = entry[:i-1] + entry[i:]
+        self.edited(entry, i - 1, scanned(entry))
+
+    def can_type_sign(self):
+        """Whether a minus sign may be typed for a negative exponent."""
+        entry = self.entry; i = self.cursor()
+        return entry and entry[i-1:i] == "e" and entry.count("-") == 0
+
+    def entry_float(self):
+        """Return the command line as a float, read from its scanned number if possible."""
+        state = self.number()
+        if state and state[0] in COMPLETE:
+            phase, m, d, x, s = state
+            value = scaled_float(m, s*x - d)
+            if value is not None: return value
+        return float(self.entry)
+
+    def entry_value(self):
+        """Return the number of the command line, as an operand: read from its scanned number, not parsed."""
+        if not self.numbers: return self.entry_float()
+        state = self.number()
+        if not state or state[0] not in COMPLETE: return self.parse(self.entry)
+        phase, m, d, x, s = state
+        return self.convert(m) if phase == 1 else self.numbers.scaled(m, s*x - d)
+
+    def entry_level(self):
+        """Return the command line as a stack level number, for (n) ROLL."""
+        pos = self.digits()
+        if pos is None: pos = self.entry_float()
+        if pos != int(pos) or not 1 <= int(pos) <= len(self.stack):
+            raise Exception("invalid stack level number")
+        return int(pos)
+
+    # Evaluation
+
+    def evaluate1(self, operation):
+        """Evaluate unary operations."""
+        stack = self.stack
+        if not self.entry and stack:
+            try: result = self.convert(operation(stack[0]))
+            except Exception as message: return message
+            self.lastx = stack[0]; stack[0] = result
+        elif self.entry:
+            try: result = self.convert(operation(self.entry_value()))
+            except Exception as message: return message
+            error = self.can_grow()
+            if error: return error
+            self.lastx = self.entry; self.entry = ""
+            stack.push(result)
+
+    def evaluate2(self, operation):
+        """Evaluate binary operations."""
+        stack = self.stack
+        if not self.entry and len(stack) >= 2:
+            try: result = self.convert(operation(stack[1], stack[0]))
+            except Exception as message: return message
+            self.lastx = stack[0]; stack[1] = result; self.drop()
+        elif self.entry and stack:
+            try: result = self.convert(operation(stack[0], self.entry_value()))
+            except Exception as message: return message
+            self.lastx = self.entry; stack[0] = result; self.entry = ""
+
+    def unary(self, name):
+        """Evaluate the named unary operation, in the current angle mode."""
+        if self.to_all: return self.map_all(self.unary_table[name], name)
+        return self.evaluate1(self.unary_table[name])
+
+    def binary(self, name):
+        """Evaluate the named binary or percentage operation."""
+        if self.to_all: return self.map_all(PERCENT[name] if name in PERCENT else BINARY[name])
+        if name in PERCENT: return self.percentage(PERCENT[name])
+        return self.evaluate2(BINARY[name])
+
+    def run(self, token):
+        """Run a named operation, or type a number on the command line, as from the keys."""
+        if token in self.unary_table: return self.unary(token)
+        if token in BINARY or token in PERCENT: return self.binary(token)
+        if token in COMMANDS: return getattr(self, COMMANDS[token])()
+        if token in WHOLE: return self.whole(token)
+        try: float(token)
+        except ValueError: return "unknown token " + token
+        error = self.push_entry()
+        if error: return error
+        self.entry = token
+
+    def percentage(self, operation):
+        """Evaluate a percentage operation of the base in Y (or X) and the rate in X (or the command line),
+        in one step: the result in X, the base kept in Y."""
+        stack = self.stack
+        if self.entry and stack:
+            try: result = self.convert(operation(stack[0], self.entry_value()))
+            except Exception as message: return message
+            error = self.can_grow()
+            if error: return error
+            self.lastx = self.entry; self.entry = ""
+            stack.push(result)
+        elif not self.entry and len(stack) >= 2:
+            try: result = self.convert(operation(stack[1], stack[0]))
+            except Exception as message: return message
+            self.lastx = stack[0]; stack[0] = result
+
+    # RPN-specific
+
+    def toggle_fixed(self):
+        """Switch between fixed XYZT and dynamic stacks."""
+        self.fixed = not self.fixed
+        if self.fixed:  # Max 4 levels, equal to 0 if not used
+            self.stack = FixedStack(self.stack)
+        else:  # All levels should be empty if not used
+            values = list(self.stack)
+            while values and values[-1] == 0: values.pop()
+            self.stack = DynamicStack(values)
+
+    def set_numbers(self, numbers):
+        """Use the numbers of a module instead of floats, or floats again if None, converting the stack:
+        nothing changes if a level is out of the range of the new numbers."""
+        stack = self.stack; old = self.numbers; lastx = self.lastx
+        try:
+            values = [renumbered(value, old, numbers) for value in stack]
+            if not isinstance(lastx, str): lastx = renumbered(lastx, old, numbers)
+        except OverflowError: return "math range error"
+        for level in range(len(values)): stack[level] = values[level]
+        self.lastx = lastx
+        self.use_numbers(numbers)
+
+    def use_numbers(self, numbers):
+        """Swap the conversions and unary operations for the numbers of a module, or floats if None."""
+        degrees = self.degrees
+        self.numbers = numbers
+        if numbers: self.convert = numbers.convert; self.parse = numbers.parse; self.unary_tables = numbers.UNARY_TABLES
+        else: self.convert = python_int; self.parse = float; self.unary_tables = (UNARY_RADIANS, UNARY_DEGREES)
+        self.degrees = degrees
+
+    def toggle_decimal(self):
+        """Switch between floats and fixed-point decimals, with (n) decimals from the command line."""
+        import rpn_decimal  # Loaded on first use only
+        if self.entry:
+            places = self.digits()
+            if places is None:
+                try: places = python_int(self.entry)
+                except Exception as message: return message
+            if not isinstance(places, int) or not 1 <= places <= 1000: return "invalid number of decimals"
+            old = rpn_decimal.decimals; rpn_decimal.decimals = places
+            error = self.set_numbers(rpn_decimal)
+            if error: rpn_decimal.decimals = old; return error
+            self.entry = ""
+        else: return self.set_numbers(None if self.numbers is rpn_decimal else rpn_decimal)
+
+    def toggle_fraction(self):
+        """Switch between floats and exact fractions, shown as n/d first."""
+        import rpn_fraction  # Loaded on first use only
+        shown = rpn_fraction.as_fraction; rpn_fraction.show_fractions(True)
+        error = self.set_numbers(None if self.numbers is rpn_fraction else rpn_fraction)
+        if error: rpn_fraction.show_fractions(shown); return error
+
+    def toggle_fraction_view(self):
+        """Show exact fractions as n/d or as decimals."""
+        import rpn_fraction
+        rpn_fraction.show_fractions(not rpn_fraction.as_fraction)
+
+    def clear(self):
+        self.stack.clear()
+        self.entry = ""
+
+    def enter(self):
+        """ENTER the command line, or DUP the stack top level."""
+        if self.entry: return self.push_entry()
+        elif self.stack: return self.push(self.stack[0])
+
+    def backspace(self):
+        """DROP the stack top level, or CLEAR the last character on the command line."""
+        if not self.entry and self.stack: self.drop()
+        else: self.delete()
+
+    def last_x(self):
+        if self.entry:
+            try: top = self.convert(self.entry)
+            except Exception as message: return message
+            error = self.can_grow()
+            if error: return error
+            self.stack.push(top); self.entry = ""
+        return self.push(self.lastx)
+
+    def swap(self):
+        error = self.push_entry()
+        if error: return error
+        if len(self.stack) >= 2: self.stack.swap()
+
+    def over(self):
+        if self.fixed or len(self.stack) >= 2: return self.push(self.stack[1])
+
+    def roll_down(self):
+        """ROLL down the first (n) levels, n from the command line, or all levels."""
+        stack = self.stack
+        if self.entry:
+            try: pos = self.entry_level()
+            except Exception as message: return message
+            self.entry = ""
+            stack.roll_down(pos)
+        elif len(stack) >= 2: stack.roll_down(len(stack))
+
+    def roll_up(self):
+        """ROLL up the first (n) levels, n from the command line, or all levels."""
+        stack = self.stack
+        if self.entry:
+            try: pos = self.entry_level()
+            except Exception as message: self.entry = ""; return message
+            self.entry = ""
+            stack.roll_up(pos)
+        elif len(stack) >= 2: stack.roll_up(len(stack))
+
+    def drop_to(self, level):
+        """DROP all levels from top down to the given one."""
+        self.stack.drop_to(level)
+
+    def pick(self, level):
+        """PICK the value in the given level, instead of the stack top value."""
+        self.stack[0] = self.stack[level]
+
+    def roll_to(self, level):
+        """ROLL the stack top value down to the given level."""
+        self.stack.roll_down(level + 1)
+
+    def push_pi(self):
+        return self.push_entry() or self.push(self.numbers.pi() if self.numbers else pi)
+
+    def push_random(self):
+        if not self.entry: return self.push(random())
+
+    def push_e(self):
+        return self.push_entry() or self.push(self.numbers.e() if self.numbers else exp(1))
+
+    def rand(self):
+        return self.push_entry() or self.push_random()
+
+    def dup(self):
+        return self.push_entry() or self.enter()
+
+    def drop_x(self):
+        error = self.push_entry()
+        if error: return error
+        if self.stack: self.drop()
+
+    def over_x(self):
+        return self.push_entry() or self.over()
+
+    def set_degrees(self): self.degrees = True
+
+    def set_radians(self): self.degrees = False
+
+    def set_fixed(self):
+        if not self.fixed: self.toggle_fixed()
+
+    def set_dynamic(self):
+        if self.fixed: self.toggle_fixed()
+
+    # Whole stack, with rpn_vector loaded on first use only
+
+    def all_levels(self):
+        """Apply the next unary or binary operation to all levels."""
+        self.to_all = True
+
+    def map_all(self, function, name=None):
+        """Apply the named unary operation to all levels, or a binary one with the command line,
+        or else X, as second operand."""
+        import rpn_vector
+        self.to_all = False
+        stack = self.stack; top = 0
+        if name:
+            error = self.push_entry()
+            if error or not stack: return error
+            lastx = stack[0]; vector = rpn_vector.vector_unary(name, self.degrees)
+        else:
+            if self.entry:
+                try: y = self.entry_value()
+                except Exception as message: return message
+                lastx = self.entry
+            elif len(stack) >= 2: y = lastx = stack[0]; top = 1
+            else: return
+            operation = function; function = vector = lambda x: operation(x, y)
+        try: rpn_vector.map_levels(self, function, vector, top)
+        except Exception as message: return message
+        self.lastx = lastx
+        if not name: self.entry = ""
+
+    def whole(self, name):
+        """Replace all levels by their sum, product, mean, minimum or maximum, or sort or reverse them."""
+        error = self.push_entry()
+        if error or not self.stack: return error
+        import rpn_vector
+        lastx = self.stack[0]
+        try:
+            if name in rpn_vector.REDUCE: rpn_vector.reduce_levels(self, name); self.lastx = lastx
+            else: rpn_vector.order_levels(self, name)
+        except Exception as message: return message
+
+    # UNDO and REDO
+
+    def modes(self):
+        return (self.fixed, self.degrees, self.numbers)
+
+    def begin(self):
+        """Start recording the changes of a keystroke."""
+        self.stack.start_log()
+        self.step = (self.stack, self.lastx, self.entry, self.modes()); self.change = None
+
+    def end(self):
+        """Keep the changes of the keystroke in the history, if it changed anything."""
+        if not self.step: return
+        stack, lastx, entry, modes = self.step; self.step = None
+        log = stack.stop_log()
+        if stack is self.stack and stack.unchanged(log) and lastx is self.lastx and entry is self.entry and modes == self.modes(): return
+        self.change = (stack, log, lastx, entry, modes)
+        self.history.record(self.change, RECORD_BYTES + stack.log_bytes(log))
+
+    def restore(self, record):
+        """Put back the state of a record, and return the record that puts back the current state."""
+        stack, log, lastx, entry, modes = record
+        current = self.stack
+        log = stack.revert(log)
+        if stack is not current: current.start_log(); log = current.stop_log()  # Left as it is
+        inverse = (current, log, self.lastx, self.entry, self.modes())
+        self.stack = stack; self.lastx = lastx; self.entry = entry
+        self.fixed = modes[0]; self.use_numbers(modes[2]); self.degrees = modes[1]
+        return inverse
+
+    def travel(self, source, target):
+        """Move from the state of the last record of {source}, keeping the current one in {target}."""
+        if self.step: self.step[0].stop_log(); self.step = None  # This keystroke is not recorded
+        record = self.history.take(source)
+        if record:
+            inverse = self.change = self.restore(record)
+            self.history.keep(target, inverse, RECORD_BYTES + inverse[0].log_bytes(inverse[1]))
+
+    def undo(self):
+        self.travel(self.history.past, self.history.future)
+
+    def redo(self):
+        self.travel(self.history.future, self.history.past)
+
+    def prime_factorisation(self, pairs=False):
+        """Push all prime factors of X, keeping X on the stack, or (prime, exponent) pairs."""
+        if self.entry:
+            n = self.digits()
+            if n is None:
+                try: n = python_int(self.entry)
+                except Exception as message: return message
+        elif self.stack: n = self.stack[0]
+        else: return
+        from rpn_prime import factorize  # Loaded on first use only
+        try: factors = factorize(n)
+        except Exception as message: return message
+        if self.entry:
+            error = self.push(n)
+            if error: return error
+            self.entry = ""
+        for prime, exponent in factors:
+            for value in ((prime, exponent) if pairs else (prime,) * exponent):
+                error = self.push(value, False)
+                if error: return error
+
+    def prime_exponents(self):
+        return self.prime_factorisation(True)
@@ -0,0 +1,68 @@
+from math import exp, pi, sin, sqrt
+
+
+# FACTORIAL AND GAMMA FUNCTIONS
+#
+# Natural numbers get an exact big integer factorial, with Luschny's split-recursive
+# algorithm: n! is its odd part, a product of odd numbers split in balanced halves
+# so that big integers are multiplied by big integers, shifted by the power of 2.
+# Other numbers go through the Lanczos approximation of the gamma function.
+
+MEMO_SIZE = 8
+LANCZOS_G = 7
+LANCZOS = (0.99999999999980993, 676.5203681218851, -1259.1392167224028, 771.32342877765313,
+           -176.61502916214059, 12.507343278686905, -0.13857109526572012,
+           9.9843695780195716e-6, 1.5056327351493116e-7)
+
+memo = {}; recent = []  # Recent factorials, and their arguments from oldest to newest
+
+
+def odd_product(count, odd):
+    """Return the product of the {count} odd numbers after odd[0], which is moved past them."""
+    if count == 1:
+        odd[0] += 2; return odd[0]
+    if count == 2:
+        odd[0] += 4; return (odd[0] - 2) * odd[0]
+    half = count // 2
+    return odd_product(count - half, odd) * odd_product(half, odd)
+
+def exact_factorial(n):
+    """Return n! for a natural number n, as an exact integer."""
+    if n < 2: return 1
+    log2 = 0
+    while n >> (log2 + 1): log2 += 1
+    odd = [1]; high = 1; h = shift = 0
+    part = result = 1
+    while h != n:
+        shift += h
+        h = n >> log2; log2 -= 1
+        low = high; high = (h - 1) | 1
+        count = (high - low) // 2
+        if count > 0:
+            part *= odd_product(count, odd)
+            result *= part
+    return result << shift
+
+def gamma(x):
+    """Lanczos approximation of the gamma function, with the reflection formula below 1/2."""
+    if x < 0.5:
+        return pi / (sin(pi * x) * gamma(1 - x))
+    x -= 1
+    a = LANCZOS[0]; t = x + LANCZOS_G + 0.5
+    for i in range(1, LANCZOS_G + 2): a += LANCZOS[i] / (x + i)
+    half = t ** ((x + 0.5) / 2)  # Split to not overflow before exp(-t) near x = 171
+    return sqrt(2 * pi) * half * exp(-t) * half * a
+
+def factorial(x):
+    """Return x!: exact for natural numbers, gamma(x + 1) otherwise."""
+    if x == int(x):
+        n = int(x)
+        if n < 0: raise Exception("math domain error")  # Poles of gamma
+        if n in memo: return memo[n]
+        result = exact_factorial(n)
+        if len(recent) >= MEMO_SIZE: del memo[recent.pop(0)]
+        memo[n] = result; recent.append(n)
+        return result
+    result = gamma(x + 1)
+    if result - result != 0: raise OverflowError("math range error")  # Infinite
+    return result
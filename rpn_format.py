@@ -0,0 +1,115 @@
+from math import log10
+
+
+# NUMBER FORMATTING
+#
+# A value is split into sign, significant digits and decimal exponent, then written
+# as a plain decimal if it fits the row width, or in scientific (or engineering)
+# notation otherwise, for any magnitude and sign.
+# Floats start from repr(), the shortest decimal that round-trips, up to 17
+# significant digits: distinct floats, like 0.1 + 0.2 and 0.3, never look the same.
+# Integers and the numbers of rpn_decimal and rpn_fraction keep all their digits,
+# and fractions may be shown as n/d.
+
+LARGEST_PLAIN = 15  # Floats from 1e15 up are written in scientific notation
+CACHE_SIZE = 32
+
+cache = {}; recent = []  # Formatted texts, and their keys from least to most recently used
+
+
+def split(value):
+    """Return the sign, significant digits and decimal exponent of a number."""
+    if not isinstance(value, (int, float)): return value.split()  # Decimal: exact digits
+    sign = "-" if value < 0 else ""
+    if isinstance(value, int):
+        try: digits = str(abs(value))
+        except ValueError:  # CPython limits int to str conversions to 4300 digits
+            shift = int(log10(abs(value))) - 20
+            digits = str(abs(value) // 10**shift)
+            exponent = len(digits) - 1 + shift
+        else: exponent = len(digits) - 1
+    else:
+        mantissa, e, exponent = repr(abs(value)).partition("e")  # "123.45" or "1.2345e-05"
+        whole, point, decimals = mantissa.partition(".")
+        digits = (whole + decimals).lstrip("0")
+        exponent = int(exponent or 0) + len(whole) - 1 - (len(whole + decimals) - len(digits)) if digits else 0
+    digits = digits.rstrip("0") or "0"
+    return sign, digits, exponent
+
+def round_digits(digits, exponent, n):
+    """Round significant digits to n of them, the exponent growing on carry like 9.99 → 10."""
+    if len(digits) <= n: return digits, exponent
+    kept = digits[:n]
+    if digits[n] >= "5":
+        kept = str(int(kept) + 1)
+        if len(kept) > n: kept = kept[:n]; exponent += 1
+    return kept.rstrip("0") or "0", exponent
+
+def plain(sign, digits, exponent):
+    """Write significant digits as a plain decimal number."""
+    if exponent < 0:
+        return sign + "0." + "0" * (-exponent - 1) + digits
+    if len(digits) <= exponent + 1:
+        return sign + digits + "0" * (exponent + 1 - len(digits))
+    return sign + digits[:exponent+1] + "." + digits[exponent+1:]
+
+def scientific(sign, digits, exponent, width, engineering=False):
+    """Write significant digits in scientific or engineering notation, within the width."""
+    shift = exponent % 3 if engineering else 0
+    n = width - len(sign) - len("e" + str(exponent)) - 1  # Room for digits
+    digits, exponent = round_digits(digits, exponent, max(n, 1 + shift))
+    if engineering: shift = exponent % 3
+    digits += "0" * (1 + shift - len(digits))
+    text = sign + digits[:1+shift]
+    if len(digits) > 1 + shift: text += "." + digits[1+shift:]
+    text += "e" + str(exponent - shift)
+    if len(text) > width and len(digits) > 1:  # Carry made the exponent longer
+        return scientific(sign, digits, exponent, width - 1, engineering)
+    return text
+
+def rounded(sign, digits, exponent, decimals):
+    """Write exact significant digits with a number of decimals, rounded half up."""
+    shift = exponent - len(digits) + 1 + decimals
+    n = int(digits) * 10**shift if shift >= 0 else (int(digits) + 5 * 10**(-shift - 1)) // 10**-shift
+    text = str(n)
+    if decimals: text = "0" * (decimals + 1 - len(text)) + text; text = text[:-decimals] + "." + text[-decimals:]
+    return sign + text
+
+def fixed(value, decimals, width):
+    """Write a number with a fixed number of decimals, as many as the width allows."""
+    sign, digits, exponent = split(value)
+    room = width - len(sign) - max(exponent, 0) - 2  # Decimals left after "-123."
+    if room < 1 or value and exponent < -decimals:
+        return scientific(sign, digits, exponent, width)
+    if isinstance(value, float): text = "{:.{}f}".format(value, min(decimals, room))
+    else: text = rounded(sign, digits, exponent, min(decimals, room))
+    if len(text) > width: text = text[:width].rstrip(".")  # Rounded up to one more digit
+    return text
+
+def forget():
+    """Forget the formatted texts, when numbers are shown another way."""
+    cache.clear(); del recent[:]
+
+def format_number(value, mode="sci", width=27):
+    """Format a stack value within {width} characters, in mode "sci", "eng" or "fix" (21 decimals).
+
+    Recently formatted values are cached, so redrawing an unchanged stack formats nothing.
+    """
+    key = (value, type(value), mode, width)
+    if key in cache:
+        if recent[-1] != key: recent.remove(key); recent.append(key)
+        return cache[key]
+    text = value.fraction_text(width) if hasattr(value, "fraction_text") else None  # n/d
+    if text: pass
+    elif value != value or value in (float("inf"), float("-inf")): text = str(value)
+    elif mode == "fix": text = fixed(value, 21, width)
+    else:
+        sign, digits, exponent = split(value)
+        text = plain(sign, digits, exponent)
+        if len(text) > width and not isinstance(value, float) and -5 <= exponent < width - len(sign) - 2:
+            text = plain(sign, *round_digits(digits, exponent, width - len(sign) - 1 + min(exponent, 0)))  # Exact, rounded to fit
+        if len(text) > width or isinstance(value, float) and not -5 <= exponent < LARGEST_PLAIN:
+            text = scientific(sign, digits, exponent, width, mode == "eng")
+    if len(recent) >= CACHE_SIZE: del cache[recent.pop(0)]
+    cache[key] = text; recent.append(key)
+    return text
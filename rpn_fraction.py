@@ -0,0 +1,221 @@
+from math import pi as PI, exp
+
+from rpn_engine import UNARY_DEGREES, UNARY_RADIANS, python_int
+from rpn_format import forget, plain
+
+
+# EXACT FRACTIONS
+#
+# In fraction mode, numbers typed and the results of + - * / and integer powers
+# are Fraction numbers n/d, exact; other functions give floats, as in float mode.
+# Reducing by the GCD is deferred: a fraction is only reduced once its terms went
+# through BATCH operations, or to be shown, so that long chains of operations do
+# not pay a GCD at each step.
+
+BATCH = 8  # Operations on unreduced terms before a reduction
+MAX_DIGITS = 4000  # Digits of a power or of a typed number above which it is out of range
+as_fraction = True  # Fractions shown as n/d, or as decimals
+
+
+def show_fractions(shown):
+    """Show fractions as n/d, or as decimals, forgetting the texts formatted the other way."""
+    global as_fraction
+    as_fraction = shown; forget()
+
+def gcd(a, b):
+    while b: a, b = b, a % b
+    return abs(a)
+
+
+class Fraction:
+    """Exact rational number n/d, with d > 0, reduced lazily: {pending} operations since its last reduction."""
+
+    def __init__(self, n, d=1, pending=0):
+        self.n = n; self.d = d; self.pending = pending
+        if pending >= BATCH: self.reduce()
+
+    def reduce(self):
+        if self.pending:
+            g = gcd(self.n, self.d)
+            if g > 1: self.n //= g; self.d //= g
+            self.pending = 0
+        return self
+
+    def split(self):
+        """Return the sign, significant digits and decimal exponent, as rpn_format.split(), digits truncated
+        after 32 significant digits and 25 decimals."""
+        self.reduce()
+        n = abs(self.n); d = self.d
+        if not n: return "", "0", 0
+        magnitude = len(str(n)) - len(str(d))  # Decimal exponent, or one more
+        shift = max(32 - magnitude, 25)
+        digits = str(n * 10**shift // d)
+        return "-" if self.n < 0 else "", digits.rstrip("0") or "0", len(digits) - 1 - shift
+
+    def fraction_text(self, width):
+        """Return "n/d" if fractions are shown so and it fits the width, or None."""
+        if not as_fraction: return
+        self.reduce()
+        if self.d == 1: return
+        text = "{}/{}".format(self.n, self.d)
+        if len(text) <= width: return text
+
+    def __str__(self):
+        self.reduce()
+        if self.d == 1: return str(self.n)
+        if as_fraction: return "{}/{}".format(self.n, self.d)
+        return plain(*self.split())
+
+    __repr__ = __str__
+
+    def __float__(self):
+        return self.n / self.d
+
+    def __int__(self):
+        q = abs(self.n) // self.d
+        return q if self.n >= 0 else -q
+
+    def __bool__(self):
+        return self.n != 0
+
+    def __hash__(self):
+        self.reduce()
+        return hash((self.n, self.d))
+
+    def __neg__(self):
+        return Fraction(-self.n, self.d, self.pending)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return Fraction(abs(self.n), self.d, self.pending)
+
+    def __add__(self, other):
+        if isinstance(other, float): return float(self) + other
+        other = to_fraction(other); pending = self.pending + other.pending + 1
+        if self.d == other.d: return Fraction(self.n + other.n, self.d, pending)
+        return Fraction(self.n * other.d + other.n * self.d, self.d * other.d, pending)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self + -other
+
+    def __rsub__(self, other):
+        return -self + other
+
+    def __mul__(self, other):
+        if isinstance(other, float): return float(self) * other
+        other = to_fraction(other)
+        return Fraction(self.n * other.n, self.d * other.d, self.pending + other.pending + 1)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, float): return float(self) / other
+        return divide(self, to_fraction(other))
+
+    def __rtruediv__(self, other):
+        if isinstance(other, float): return other / float(self)
+        return divide(to_fraction(other), self)
+
+    def __pow__(self, other):
+        return power(self, other)
+
+    def __rpow__(self, other):
+        if isinstance(other, float): return other ** float(self)
+        return power(to_fraction(other), self)
+
+    def compare(self, other):
+        if isinstance(other, float): a = float(self); b = other
+        else: other = to_fraction(other); a = self.n * other.d; b = other.n * self.d
+        return (a > b) - (a < b)
+
+    def __eq__(self, other):
+        try: return self.compare(other) == 0
+        except (TypeError, ValueError, OverflowError): return False
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __lt__(self, other):
+        return self.compare(other) < 0
+
+    def __le__(self, other):
+        return self.compare(other) <= 0
+
+    def __gt__(self, other):
+        return self.compare(other) > 0
+
+    def __ge__(self, other):
+        return self.compare(other) >= 0
+
+
+def to_fraction(x):
+    if isinstance(x, Fraction): return x
+    if isinstance(x, int): return Fraction(x)
+    raise TypeError("unsupported operand")
+
+def divide(x, y):
+    if not y.n: raise ZeroDivisionError("divide by zero")
+    n = x.n * y.d; d = x.d * y.n
+    if d < 0: n = -n; d = -d
+    return Fraction(n, d, x.pending + y.pending + 1)
+
+def power(x, y):
+    """x**y: exact for integer y, reducing x first, as powers of reduced terms stay reduced."""
+    if isinstance(y, Fraction) and y.reduce().d == 1: y = y.n
+    if not isinstance(y, int): return float(x) ** float(y)
+    x.reduce()
+    if (len(str(x.n)) + len(str(x.d))) * abs(y) > MAX_DIGITS: raise OverflowError("math range error")
+    if y >= 0: return Fraction(x.n ** y, x.d ** y)
+    if not x.n: raise ZeroDivisionError("divide by zero")
+    n = x.d ** -y; d = x.n ** -y
+    return Fraction(-n, -d) if d < 0 else Fraction(n, d)
+
+def parse(text):
+    """Return the exact fraction written in a text like "-1.25e-3"."""
+    mantissa, e, exponent = text.lower().partition("e")
+    whole, point, fraction = mantissa.lstrip("+-").partition(".")
+    if not (whole + fraction).isdigit(): raise ValueError("invalid syntax for number")
+    try: exponent = (int(exponent) if e else 0) - len(fraction)
+    except ValueError: raise ValueError("invalid syntax for number")
+    n = int(whole + fraction)
+    if mantissa.startswith("-"): n = -n
+    return scaled(n, exponent)
+
+def scaled(n, exponent):
+    """Return the exact fraction n * 10**exponent."""
+    if abs(exponent) > MAX_DIGITS: raise OverflowError("math range error")
+    return Fraction(n * 10**exponent) if exponent >= 0 else Fraction(n, 10**-exponent, 1).reduce()
+
+def convert(x):
+    """Keep fractions and make integers fractions, or convert numbers written in strings exactly."""
+    if isinstance(x, Fraction): return x
+    if isinstance(x, int): return Fraction(x)
+    if isinstance(x, str): return parse(x)
+    x = python_int(x)
+    return Fraction(x) if isinstance(x, int) else x
+
+def to_float(x):
+    """Return a fraction as an int if it is one, or as a float."""
+    if not isinstance(x, Fraction): return x
+    x.reduce()
+    return x.n if x.d == 1 else float(x)
+
+def pi():
+    return PI
+
+def e():
+    return exp(1)
+
+
+# NAMED OPERATIONS: those of floats, with an exact inverse
+
+def unary_table(table):
+    table = dict(table)
+    table["inv"] = lambda x: divide(Fraction(1), x) if isinstance(x, Fraction) else 1/x
+    return table
+
+UNARY_TABLES = (unary_table(UNARY_RADIANS), unary_table(UNARY_DEGREES))
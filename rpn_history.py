@@ -0,0 +1,43 @@
+# UNDO HISTORY
+#
+# A record holds what a keystroke changed, not a copy of the state: the stack it
+# started from, the log of the levels it overwrote (their former values, shared
+# with the record, not copied), and the former LastX, command line and modes.
+# Putting a record back returns the record that reverts it, so UNDO and REDO are
+# the same operation on the past and future lists.
+
+BUDGET = 4096  # Estimated bytes of all records, beyond which the oldest are forgotten
+RECORD_BYTES = 48  # Estimated bytes of a record, besides its stack log
+
+
+class History:
+    """Undo and redo records, within a memory budget."""
+
+    def __init__(self, budget=BUDGET):
+        self.budget = budget
+        self.past = []; self.future = []  # (record, bytes), most recent last
+        self.size = 0
+
+    def record(self, record, size):
+        """Keep the record of a new keystroke: the future is forgotten."""
+        for old in self.future: self.size -= old[1]
+        self.future = []
+        self.keep(self.past, record, size)
+
+    def keep(self, records, record, size):
+        records.append((record, size)); self.size += size
+        while self.size > self.budget and len(self.past) + len(self.future) > 1:
+            oldest = self.past.pop(0) if self.past else self.future.pop(0)
+            self.size -= oldest[1]
+
+    def take(self, records):
+        """Remove and return the most recent record of a list, or None."""
+        if not records: return
+        record, size = records.pop(); self.size -= size
+        return record
+
+    def forget(self):
+        """Forget all records, to give their memory back, and return whether there were any."""
+        found = bool(self.past or self.future)
+        self.past = []; self.future = []; self.size = 0
+        return found
@@ -0,0 +1,112 @@
+from time import monotonic, sleep
+
+from ion import keydown
+
+
+# KEYBOARD FUNCTIONS
+#
+# Each scan reads the whole keyboard once. New presses, and auto-repeats of keys
+# held down, are queued as (key, time) events, so that keys pressed while the
+# screen is drawing are not lost, and are read in order by the key loops. All of
+# them wait in wait_for_keys(), which sleeps between scans while no key is down,
+# longer and longer, so that the calculator idles instead of polling flat out.
+
+NB_KEYS = 53
+DEBOUNCE = 0.03  # Minimum delay between two presses of the same key, in seconds
+POLL_FASTEST = 0.01  # Seconds between two scans right after a key, or while one is held down
+POLL_SLOWEST = 0.05  # Longest seconds between two scans, once idle
+BACKOFF = 1.25  # Growth of the seconds between two scans, at each idle scan
+
+state = 0  # Bitmap of the keys held down during the last scan
+scan_time = 0  # Duration of the last keyboard scan, in seconds
+queue = []  # Pending (key, time) events, oldest first
+last_press = {}  # Time of the last event of each key
+repeats = {}  # Key: [delay, interval, acceleration, fastest interval]
+held_since = {}  # Key: [time of the next repeat, current interval]
+latency_hook = None  # Called with (key, seconds) when the action of a key is done
+latency = 0  # Key-to-screen latency of the last action, in seconds
+
+
+def set_repeat(keys, delay=0.4, interval=0.12, acceleration=0.8, fastest=0.03):
+    """Auto-repeat {keys} held down after {delay}, each repeat {acceleration} times faster."""
+    for key in keys: repeats[key] = (delay, interval, acceleration, fastest)
+
+set_repeat((0, 1, 2, 3, 17))  # Arrows, for the cursor and level selection, BACKSPACE
+
+
+def scan():
+    """Read the whole keyboard once, and queue new presses and auto-repeats."""
+    global state, scan_time
+    start = monotonic(); held = 0; bit = 1
+    for key in range(NB_KEYS):
+        if keydown(key): held |= bit
+        bit <<= 1
+    now = monotonic(); scan_time = now - start
+    pressed = held & ~state
+    state = held
+    key = 0
+    while pressed:
+        if pressed & 1 and now - last_press.get(key, -1) >= DEBOUNCE:
+            queue.append((key, now)); last_press[key] = now
+            if key in repeats: held_since[key] = [now + repeats[key][0], repeats[key][1]]
+        pressed >>= 1; key += 1
+    for key in list(held_since):
+        if not held >> key & 1: del held_since[key]
+        elif now >= held_since[key][0]:
+            timing = held_since[key]; acceleration, fastest = repeats[key][2:]
+            queue.append((key, now)); last_press[key] = now
+            timing[0] = now + timing[1]; timing[1] = max(timing[1] * acceleration, fastest)
+
+
+def read_event():
+    """Return the oldest pending (key, time) event, or None if no key went down."""
+    if not queue: scan()
+    return queue.pop(0) if queue else None
+
+
+def read_key():
+    """Return the oldest pending key number, or -1 if no key went down."""
+    event = read_event()
+    return event[0] if event else -1
+
+
+def flush():
+    """Forget the pending key presses, eg. before showing an error."""
+    del queue[:]
+
+
+def wait_for_keys(keys=None, timeout=None, idle=None):
+    """Wait for a key press among {keys} (any key if None), at most {timeout} seconds (forever if None),
+    calling {idle} on each idle scan, and return its (key, time) event, or None after the timeout."""
+    interval = POLL_FASTEST
+    end = None if timeout is None else monotonic() + timeout
+    while True:
+        event = read_event()
+        if event and (keys is None or event[0] in keys): return event
+        if event: interval = POLL_FASTEST; continue  # Another key: read on
+        if idle: idle()
+        if end is not None and monotonic() >= end: return None
+        if state: interval = POLL_FASTEST  # Keys held down: auto-repeats are due
+        sleep(interval)
+        interval = min(interval * BACKOFF, POLL_SLOWEST)
+
+
+def wait_event(keys=None, idle=None):
+    """Wait for a key press among {keys} (any key if None), calling {idle} on each idle scan."""
+    return wait_for_keys(keys, None, idle)
+
+
+def wait_key(keys=None, idle=None):
+    return wait_event(keys, idle)[0]
+
+
+def dispatch(actions, idle=None):
+    """Wait for a key of the {actions} table, run its action, and measure its latency."""
+    global latency
+    key, time = wait_event(actions, idle)
+    actions[key]()
+    latency = monotonic() - time
+    if latency_hook: latency_hook(key, latency)
+
+
+scan(); flush()  # Keys held down when the script starts are not presses
@@ -0,0 +1,93 @@
+from kandinsky import draw_string, fill_rect
+
+from rpn_keys import wait_key
+
+
+# MENUS
+#
+# Dialogs seldom opened, with most of the strings of the script: this module is
+# imported when one of them opens, and forgotten again when it closes.
+
+
+def draw_title(title):
+    """Display the title bar of a dialog box, with the title centred."""
+    fill_rect(27, 27, 266, 21, (65,64,65))
+    fill_rect(28, 28, 264, 19, (108,99,115))
+    draw_string(title, 160 - 5*len(title), 28, (255,254,255), (108,99,115))
+
+def draw_item(line, items, descriptions, selected=False):
+    """Display a menu item line, eventually on a selected background."""
+    h = 174 // len(items)
+    bg_color = (214,213,231) if selected else (255,254,255)
+    fill_rect(28, 49 + h*line, 264, h - 1, bg_color)
+    draw_string(items[line], 35, 41 + h*line + h // 2, (0,0,0), bg_color)
+    draw_string(descriptions[line], 285 - 10*len(descriptions[line]), 41 + h*line + h // 2, (164,165,164), bg_color)
+
+def draw_menu(items, descriptions):
+    """Display all items and descriptions menu inside a dialog box."""
+    fill_rect(27, 48, 266, 174, (238,238,238))
+    fill_rect(28, 49, 264, 173, (255,254,255))
+    h = 174 // len(items)
+    for i in range(len(items)):
+        draw_item(i, items, descriptions)
+        fill_rect(28, 48 + h*i, 264, 1, (238,238,238))
+    fill_rect(28, 48 + h*len(items), 264, 1, (238,238,238))
+
+
+def varbox():
+    """Display a dialog with functions mapped to ALPHA + some key."""
+    keys = ("D R", "E", "Q", "C F", "H", "P", "?", "M N", "A S")
+    desc = ("Degrees/radians", "(n) decimals/floats", "Fractions n/d/floats", "°F to °C/°C to °F", "Convert hrs to h:min", "Prime factorisation", "Random number in [0,1)", "Record/replay (n)", "All levels/stack")
+    draw_title("Alpha shortcuts")
+    draw_menu(keys, desc)
+    wait_key((4, 5, 15))  # OK, BACK, VAR
+
+
+def toolbox():
+    """Display a dialog with common RPN functions and their mappings."""
+    keys = (" xnt", "  (", "  )", " Ans", "[shift]Ans", "[shift] ÷", "[shift] -", " back", "[shift]back")
+    desc = ("Fixed/dynamic stack", "ROLL (n)/all levels", "SWAP last two levels", "Copy last X value", "Copy 2nd level", "Inverse", "Change signs", "Undo last key", "Redo")
+    draw_title("Hotkeys")
+    draw_menu(keys, desc)
+    wait_key((4, 5, 16))  # OK, BACK, TOOLBOX
+
+
+def choose(title, items, descriptions):
+    """Display a dialog with a menu, and return the line of the item chosen, or None."""
+    draw_title(title)
+    draw_menu(items, descriptions)
+    line = 0
+    draw_item(0, items, descriptions, True)
+    while True:
+        key = wait_key((1, 2, 4, 52, 5))
+        if key == 1 and line > 0:  # UP
+            draw_item(line, items, descriptions)
+            draw_item(line - 1, items, descriptions, True)
+            line -= 1
+        if key == 2 and line < len(items) - 1:  # DOWN
+            draw_item(line, items, descriptions)
+            draw_item(line + 1, items, descriptions, True)
+            line += 1
+        if key == 4 or key == 52: return line  # OK/EXE
+        if key == 5: return  # BACK
+
+PERCENTAGES = (  # Binary or percentage operation of the engine, and its description: a new item is a new line
+    ("%", "Percentage of X"),
+    ("Δ%", "Percent difference"),
+    ("%T", "Percent of total"),
+    ("±%", "Evolution or markup"),
+    ("MU%P", "Markup on price"),
+)
+
+def percentage():
+    """Display a dialog with common percentage functions, and return the name of the one chosen, or None."""
+    items = [item[0] for item in PERCENTAGES]
+    line = choose("Percentage", items, [item[1] for item in PERCENTAGES])
+    if line is not None: return items[line]
+
+def whole_stack():
+    """Display a dialog with the operations on all levels, and return the name of the one chosen, or None."""
+    items = ("Σ", "Π", "mean", "min", "max", "sort", "rev")
+    descriptions = ("Sum of all levels", "Product of all levels", "Mean of all levels", "Smallest level", "Largest level", "Sort, smallest in X", "Reverse the levels")
+    line = choose("Whole stack", items, descriptions)
+    if line is not None: return ("sum", "prod", "mean", "min", "max", "sort", "rev")[line]
@@ -0,0 +1,102 @@
+from random import randrange
+
+
+# PRIME FACTORISATION
+#
+# Trial division by the small primes of a sieve first, then a deterministic
+# Miller-Rabin test tells primes apart, and Pollard-Brent rho splits what is left:
+# any 64-bit number is fully factored within a bounded time. Beyond, rho gives up
+# after MAX_STEPS steps rather than run for ever, as the calculator cannot be
+# interrupted while the script runs.
+
+SMALL_LIMIT = 1000
+MAX_STEPS = 1 << 20  # Steps of rho before a number is "too large": 64-bit semiprimes take up to ~1 << 18
+WITNESSES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)  # Deterministic below 3.3e24
+
+
+def gcd(a, b):
+    while b: a, b = b, a % b
+    return a
+
+try: power_mod = pow; pow(2, 2, 3)
+except Exception:  # No 3-argument pow on this MicroPython port
+    def power_mod(a, d, n):
+        result = 1; a %= n
+        while d:
+            if d & 1: result = result * a % n
+            a = a * a % n; d >>= 1
+        return result
+
+def sieve(limit):
+    """Return the primes below {limit}, with the sieve of Eratosthenes."""
+    composite = bytearray(limit)
+    for p in range(2, int(limit ** 0.5) + 1):
+        if not composite[p]:
+            for multiple in range(p*p, limit, p): composite[multiple] = 1
+    return [p for p in range(2, limit) if not composite[p]]
+
+SMALL_PRIMES = sieve(SMALL_LIMIT)
+
+
+def is_prime(n):
+    """Miller-Rabin primality test, deterministic for n below 3.3e24."""
+    if n < 2: return False
+    for p in WITNESSES:
+        if n % p == 0: return n == p
+    d = n - 1; s = 0
+    while d % 2 == 0: d //= 2; s += 1
+    for a in WITNESSES:
+        x = power_mod(a, d, n)
+        if x == 1 or x == n - 1: continue
+        for i in range(s - 1):
+            x = x * x % n
+            if x == n - 1: break
+        else:
+            return False
+    return True
+
+def pollard_brent(n, limit=MAX_STEPS):
+    """Return a non-trivial divisor of a composite odd number n, with Brent's variant of rho,
+    or raise "too large" after {limit} steps."""
+    steps = 0
+    while True:
+        y = randrange(1, n); c = randrange(1, n); m = 128
+        g = r = q = 1
+        while g == 1:
+            steps += 2 * r
+            if steps > limit: raise Exception("too large")
+            x = y
+            for i in range(r): y = (y*y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for i in range(min(m, r - k)):
+                    y = (y*y + c) % n
+                    q = q * abs(x - y) % n
+                g = gcd(q, n); k += m
+            r *= 2
+        if g == n:  # Batched gcd went too far: step back one at a time
+            g = 1
+            while g == 1:
+                ys = (ys*ys + c) % n
+                g = gcd(abs(x - ys), n)
+        if g != n: return g
+
+def factorize(n):
+    """Return the prime factorisation of a natural number n >= 1, as sorted (prime, exponent) pairs: [(1, 1)] for 1."""
+    if n != int(n) or n < 1:
+        raise Exception("math domain error")
+    if n == 1: return [(1, 1)]  # As the former lowest divisor search
+    n = int(n); factors = {}
+    for p in SMALL_PRIMES:
+        if p * p > n: break
+        while n % p == 0: factors[p] = factors.get(p, 0) + 1; n //= p
+    pending = [n] if n > 1 else []
+    while pending:
+        m = pending.pop()
+        if m < SMALL_LIMIT * SMALL_LIMIT or is_prime(m):  # No small factor left below 1000²
+            factors[m] = factors.get(m, 0) + 1
+        else:
+            d = pollard_brent(m)
+            pending.append(d); pending.append(m // d)
+    return sorted(factors.items())
@@ -0,0 +1,61 @@
+from time import monotonic
+
+try: from gc import mem_free
+except ImportError: mem_free = None  # CPython
+
+
+# PROFILING
+#
+# Instrumented functions replace the originals in their module namespace, and in
+# the key → action tables that hold them, only while profiling is on: when it is
+# off, nothing is left between a key and its action, and profiling costs nothing.
+# Times include the functions called inside, eg. display() includes draw_stack().
+
+stats = {}  # Name: [calls, seconds, lowest free heap in bytes or None]
+originals = {}  # Name: original function, while it is instrumented
+
+
+def probe(name, function):
+    """Return a version of {function} that counts its calls, time, and free heap after them."""
+    record = stats.setdefault(name, [0, 0, None])
+    def probed(*args, **kwargs):
+        start = monotonic()
+        try: return function(*args, **kwargs)
+        finally:
+            record[0] += 1; record[1] += monotonic() - start
+            if mem_free:
+                free = mem_free()
+                if record[2] is None or free < record[2]: record[2] = free
+    return probed
+
+def start(namespace, names, tables=()):
+    """Instrument the named functions of a module namespace, and of the key → action tables."""
+    stats.clear()
+    for name in names:
+        function = namespace[name]; originals[name] = function
+        namespace[name] = probed = probe(name, function)
+        for table in tables:
+            for key in table:
+                if table[key] is function: table[key] = probed
+
+def stop(namespace, tables=()):
+    """Put the original functions back."""
+    for name in originals:
+        probed = namespace[name]; namespace[name] = originals[name]
+        for table in tables:
+            for key in table:
+                if table[key] is probed: table[key] = originals[name]
+    originals.clear()
+
+def running():
+    return bool(originals)
+
+def lowest_free():
+    """Return the lowest free heap seen after any instrumented function, or None."""
+    lowest = [record[2] for record in stats.values() if record[2] is not None]
+    return min(lowest) if lowest else None
+
+def top(count=3):
+    """Return the (name, calls, seconds) of the {count} functions that took the most time."""
+    costs = sorted(((record[1], name, record[0]) for name, record in stats.items()), reverse=True)
+    return [(name, calls, seconds) for seconds, name, calls in costs[:count]]
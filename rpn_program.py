@@ -0,0 +1,129 @@
+from time import monotonic
+
+from rpn_engine import BINARY, PERCENT, UNARY_RADIANS, WHOLE
+
+
+# KEYSTROKE PROGRAMS
+#
+# While recording, the engine operations that keys call are wrapped, on the engine
+# instance only, to append each step that succeeded to the program: a (method name,
+# arguments) pair, whatever key or dialog called it. A replay compiles the steps once
+# into a flat list of (function, arguments), with the operations of unary and binary
+# steps looked up beforehand, and runs it without decoding keys nor drawing: the
+# caller refreshes the screen once at the end. Saved programs are texts of steps
+# separated by whitespace, "name" or "name:argument", eg. "type:1.2 binary:* unary:sin".
+
+RECORDED = ("type", "backspace", "enter", "unary", "binary", "swap", "over", "last_x", "clear",
+            "roll_down", "roll_up", "drop_to", "pick", "roll_to", "push_pi", "push_e", "push_random",
+            "prime_factorisation", "toggle_fixed", "set_degrees", "set_radians",
+            "toggle_decimal", "toggle_fraction", "toggle_fraction_view", "all_levels", "whole",
+            "cursor_left", "cursor_right")
+MODES = ("set_degrees", "set_radians", "toggle_decimal", "toggle_fraction")  # Steps that swap the unary table
+LEVELS = ("drop_to", "pick", "roll_to")  # Steps with a stack level as argument
+NAMED = ("type", "unary", "binary", "whole")  # Steps with a text as argument
+
+program = []  # Steps of the program recorded or loaded last
+recording = False
+
+
+# RECORDING
+
+def recorder(name, method):
+    """Return a version of an engine method that appends its successful calls to the program."""
+    def recorded(*args):
+        error = method(*args)
+        if not error: append(name, args)
+        return error
+    return recorded
+
+def append(name, args):
+    """Append a step, merging the characters typed in a row, and a backspace right after them."""
+    last = program[-1] if program else None
+    if last and last[0] == "type":
+        text = last[1][0]
+        if name == "type": program[-1] = ("type", (text + args[0],)); return
+        if name == "backspace" and len(text) > 1: program[-1] = ("type", (text[:-1],)); return
+    program.append((name, args))
+
+def start(engine):
+    """Record a new program from the operations run on the engine."""
+    global program, recording
+    program = []; recording = True
+    for name in RECORDED: setattr(engine, name, recorder(name, getattr(engine, name)))
+
+def stop(engine):
+    """Stop recording, and return the number of steps of the program."""
+    global recording
+    for name in RECORDED: delattr(engine, name)
+    recording = False
+    return len(program)
+
+
+# REPLAY
+
+def compile_steps(engine, steps):
+    """Return the steps as (function, arguments) bound to the engine, with operations looked up once,
+    unless the steps swap the unary table, or apply them to all levels."""
+    lookup = not any(name in MODES for name, args in steps)
+    compiled = []; previous = None
+    for name, args in steps:
+        if previous == "all_levels": compiled.append((getattr(engine, name), args))
+        elif name == "unary" and lookup: compiled.append((engine.evaluate1, (engine.unary_table[args[0]],)))
+        elif name == "binary" and args[0] in PERCENT: compiled.append((engine.percentage, (PERCENT[args[0]],)))
+        elif name == "binary": compiled.append((engine.evaluate2, (BINARY[args[0]],)))
+        else: compiled.append((getattr(engine, name), args))
+        previous = name
+    return compiled
+
+def replay(engine, loops=None):
+    """Run the program {loops} times, or (n) times from the command line, and return the error if any,
+    the number of steps run and their seconds."""
+    if not program: return "no program recorded", 0, 0
+    if loops is None:
+        loops = 1
+        if engine.entry:
+            try: loops = int(engine.entry)
+            except ValueError: loops = 0
+            if loops < 1: return "invalid loop count", 0, 0
+            engine.entry = ""
+    compiled = compile_steps(engine, program)
+    stack = engine.stack; log = stack.pause_log()  # A single UNDO step, the stack copied once
+    count = 0; start = monotonic()
+    try:
+        for i in range(loops):
+            for function, args in compiled:
+                error = function(*args)
+                if error: return error, count, monotonic() - start
+                count += 1
+        return None, count, monotonic() - start
+    finally: stack.resume_log(log)
+
+
+# SAVING AND LOADING
+
+def dumps(steps):
+    """Return the text of steps."""
+    return " ".join("{}:{}".format(name, args[0]) if args else name for name, args in steps)
+
+def loads(text):
+    """Return the steps of a text, or raise ValueError on an invalid step."""
+    steps = []
+    for token in text.split():
+        name, colon, arg = token.partition(":")
+        if name in LEVELS and arg.isdigit(): steps.append((name, (int(arg),)))
+        elif (name == "type" and arg or name == "unary" and arg in UNARY_RADIANS
+              or name == "binary" and (arg in BINARY or arg in PERCENT) or name == "whole" and arg in WHOLE):
+            steps.append((name, (arg,)))
+        elif name in RECORDED and name not in LEVELS and name not in NAMED and not colon:
+            steps.append((name, ()))
+        else: raise ValueError("invalid step " + token)
+    return steps
+
+def save(path):
+    with open(path, "w") as file: file.write(dumps(program) + "\n")
+
+def load(path):
+    """Load the program of a file, and return its number of steps."""
+    global program
+    with open(path) as file: program = loads(file.read())
+    return len(program)
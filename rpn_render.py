@@ -0,0 +1,95 @@
+# STACK AREA RENDERING
+#
+# The renderer keeps a shadow copy of what is on screen for each row of the stack
+# area: None for an empty row, DIRTY when unknown, or the (text, x, selected, name)
+# drawn. Each frame only emits the fill_rect/draw_string calls for rows that changed.
+# The rows are a viewport over the dynamic stack, turned a page at a time to keep the
+# selected level in view: rows are recycled, their background kept, and only the
+# names and texts that changed drawn again, so that a frame costs the same at any
+# stack depth, and moving the selection within a page redraws two rows.
+
+from rpn_format import format_number
+
+DIRTY = False
+BACKGROUND = (245,250,255)
+SELECTED = (214,213,231)
+ROWS = 8  # Rows of the dynamic stack shown
+
+
+def format_value(value, fixed, width=27):
+    """Format a stack value, and return it with the abscissa to draw it at."""
+    if fixed:
+        x = 40 if value >= 0 else 30
+        return format_number(value, "fix", (320 - x) // 10), x
+    text = format_number(value, "sci", width)
+    return text, 310 - 10*len(text)
+
+
+class StackRenderer:
+    """Draw the stack area, repainting only the rows that changed since the last frame."""
+
+    def __init__(self, fill_rect, draw_string):
+        self.fill_rect = fill_rect; self.draw_string = draw_string
+        self.counts = [0, 0, 0]  # fill_rect calls, draw_string calls, pixels filled
+        self.last = (0, 0, 0)  # Counts of the last operation
+        self.fixed = False; self.invalidate()
+        self.first = 0  # Level shown in the bottom row
+
+    def invalidate(self):
+        """Forget the screen content: the next frame repaints the whole stack area."""
+        self.rows = None
+
+    def damage(self, y, height):
+        """Mark the rows overlapping a band of the screen as overwritten by something else."""
+        if self.rows is None: return
+        h = 46 if self.fixed else 23
+        for row in range(len(self.rows)):
+            top = 184 - (row+1)*h
+            if top < y + height and y < top + h: self.rows[row] = DIRTY
+
+    def end_operation(self):
+        """Keep the draw counts of the operation just done, and start counting again."""
+        self.last = tuple(self.counts)
+        self.counts = [0, 0, 0]
+
+    def fill(self, x, y, width, height, color):
+        self.fill_rect(x, y, width, height, color)
+        counts = self.counts
+        counts[0] += 1; counts[2] += width * height
+
+    def text(self, text, x, y, bg_color):
+        self.draw_string(text, x, y, (0,0,0), bg_color)
+        self.counts[1] += 1
+
+    def render(self, stack, fixed, selected=-1):
+        """Repaint the rows whose text or selection changed, {selected} being a level or -1,
+        on the page of rows that shows it."""
+        if self.rows is None or self.fixed != fixed:
+            self.fixed = fixed
+            self.rows = [None] * (4 if fixed else ROWS)
+            self.fill(0, 0, 320, 184, BACKGROUND)
+        rows = self.rows; depth = len(stack)
+        first = self.first = selected - selected % len(rows) if selected > 0 else 0  # Page of the selected level
+        height = 46 if fixed else 23
+        empty = [row for row in range(len(rows)) if first + row >= depth and rows[row] is not None]
+        if empty:  # Rows past the last level, cleared at once
+            self.fill(0, 184 - (empty[-1]+1)*height, 320, (empty[-1] - empty[0] + 1)*height, BACKGROUND)
+            for row in empty: rows[row] = None
+        for row in range(min(len(rows), depth - first)):
+            old = rows[row]; level = first + row
+            name = ("X:", "Y:", "Z:", "T:")[level] if fixed else str(level + 1) + ":"
+            text, x = format_value(stack[level], fixed, min(27, 30 - len(name)))
+            new = (text, x, level == selected, name)
+            if new == old: continue
+            bg_color = BACKGROUND if row % 2 == 0 else (255,254,255)
+            y_text = 185 - (row+1)*height + (height - 18) // 2
+            if not old:  # Empty or overwritten row: paint all of it
+                self.fill(0, 184 - (row+1)*height, 320, height, bg_color)
+                self.text(name, 10, y_text, bg_color)
+            else:  # Recycled row: only clear what the new text does not cover
+                if name != old[3]: self.text(name + " " * (len(old[3]) - len(name)), 10, y_text, bg_color)
+                x_old = old[1]; end_old = x_old + 10*len(old[0]); end = x + 10*len(text)
+                if x_old < x: self.fill(x_old, y_text, min(x, end_old) - x_old, 18, bg_color)
+                if end_old > end: self.fill(max(x_old, end), y_text, end_old - max(x_old, end), 18, bg_color)
+            self.text(text, x, y_text, SELECTED if new[2] else bg_color)
+            rows[row] = new
@@ -0,0 +1,247 @@
+from array import array
+from struct import pack, unpack
+from time import monotonic
+
+from rpn_engine import RPNEngine
+from rpn_stack import EXACT, DynamicStack, FixedStack
+
+try: from os import rename
+except ImportError: rename = None  # NumWorks: files written in place
+
+
+# SESSION
+#
+# The state of the engine outlives the script, in two files: a snapshot of the
+# whole state, the buffers of the dynamic stack written as they are, and a journal
+# that each keystroke appends its changes to: the levels found in its UNDO record,
+# or in the record an UNDO or REDO keeps, its new modes, or all levels of a new
+# stack, so that a keystroke on a deep stack writes a few bytes, not the stack. The
+# journal stays open, and is only written out once the keyboard has been idle for
+# FLUSH_DELAY, or on quitting: the keystrokes of the last moments before a crash may
+# be lost. A new snapshot replaces the journal when it grows past JOURNAL_BYTES, or
+# when a keystroke swapped the buffers of the stack. Both files start with the same
+# generation number: a journal left by a crash while writing a snapshot is ignored,
+# as is an entry cut short. Where files cannot be written, as without a file
+# system, the session is simply not kept.
+
+SNAPSHOT = "rpn_state.bin"; JOURNAL = "rpn_journal.bin"
+MAGIC = b"RPN2"
+JOURNAL_BYTES = 4096  # Journal size above which a snapshot is written instead
+SWAPPED_LEVELS = 64  # Levels of a new stack above which a snapshot is written instead
+FLUSH_DELAY = 0.5  # Idle seconds after a keystroke before the journal is written out
+
+
+# VALUES: a tag byte, then 8 bytes for floats and exact integers, or a text
+
+def dump_value(out, value):
+    """Append the bytes of a number or of a text to a list."""
+    if isinstance(value, float): out.append(b"f" + pack("<d", value)); return
+    if isinstance(value, int) and -EXACT <= value <= EXACT: out.append(b"i" + pack("<d", value)); return
+    if isinstance(value, str): tag, text = b"s", value
+    elif isinstance(value, int): tag, text = b"I", str(value)
+    elif hasattr(value, "scale"): tag, text = b"D", "{} {}".format(value.n, value.scale)
+    else: value.reduce(); tag, text = b"Q", "{} {}".format(value.n, value.d)
+    text = text.encode()
+    out.append(tag + pack("<I", len(text)) + text)
+
+
+class Reader:
+    """Bytes read in order, raising ValueError past their end."""
+
+    def __init__(self, data):
+        self.data = data; self.position = 0
+
+    def take(self, n):
+        start = self.position; self.position += n
+        if self.position > len(self.data): raise ValueError("truncated session file")
+        return self.data[start:self.position]
+
+    def integer(self):
+        return unpack("<I", self.take(4))[0]
+
+    def value(self):
+        tag = self.take(1)
+        if tag == b"f": return unpack("<d", self.take(8))[0]
+        if tag == b"i": return int(unpack("<d", self.take(8))[0])
+        text = self.take(self.integer()).decode()
+        if tag == b"s": return text
+        if tag == b"I": return int(text)
+        n, d = text.split()
+        if tag == b"D":
+            from rpn_decimal import Decimal
+            return Decimal(int(n), int(d))
+        if tag == b"Q":
+            from rpn_fraction import Fraction
+            return Fraction(int(n), int(d))
+        raise ValueError("invalid session file")
+
+
+# SNAPSHOT: magic, generation, modes, lastX, entry, then the levels
+
+def modes(engine):
+    """Return the modes of the engine, as numbers: fixed, degrees, numbers, fractions shown, decimals."""
+    numbers = engine.numbers; name = numbers.__name__ if numbers else ""
+    if name == "rpn_decimal": return (engine.fixed, engine.degrees, 1, 0, numbers.decimals)
+    if name == "rpn_fraction": return (engine.fixed, engine.degrees, 2, numbers.as_fraction, 0)
+    return (engine.fixed, engine.degrees, 0, 0, 0)
+
+def use_modes(engine, fixed, degrees, numbers, shown, decimals):
+    """Put back the modes of the engine, as numbers, without converting its stack."""
+    if numbers == 1:
+        import rpn_decimal
+        rpn_decimal.decimals = decimals; engine.use_numbers(rpn_decimal)
+    elif numbers == 2:
+        import rpn_fraction
+        rpn_fraction.show_fractions(bool(shown)); engine.use_numbers(rpn_fraction)
+    else: engine.use_numbers(None)
+    engine.fixed = bool(fixed); engine.degrees = bool(degrees)
+
+def dump(engine, generation):
+    """Return the bytes of a snapshot of the engine."""
+    out = [MAGIC, pack("<IBBBBH", generation, *modes(engine))]
+    dump_value(out, engine.lastx); dump_value(out, engine.entry)
+    stack = engine.stack
+    if engine.fixed:
+        for value in stack: dump_value(out, value)
+        return b"".join(out)
+    size = stack.size
+    out.append(pack("<I", size)); out.append(bytes(stack.kinds[:size]))
+    out.append(bytes(memoryview(stack.values)[:size]))  # Native byte order, as the calculator reads it back
+    out.append(pack("<I", len(stack.big)))
+    for i in stack.big: out.append(pack("<I", i)); dump_value(out, stack.big[i])
+    return b"".join(out)
+
+def load(engine, reader):
+    """Put the state of a snapshot in a new engine, and return its generation."""
+    if reader.take(4) != MAGIC: raise ValueError("invalid session file")
+    generation = reader.integer(); state = unpack("<BBBBH", reader.take(6))
+    use_modes(engine, *state)
+    engine.lastx = reader.value(); engine.entry = reader.value()
+    if state[0]:
+        engine.stack = FixedStack([reader.value() for level in range(4)])
+        return generation
+    size = reader.integer()
+    kinds = bytearray(reader.take(size)); values = array("d", reader.take(8 * size))
+    big = {}
+    for k in range(reader.integer()): i = reader.integer(); big[i] = reader.value()
+    engine.stack.adopt(values, kinds, big, size)
+    return generation
+
+
+# JOURNAL: magic and generation, then an entry per keystroke: flags, stack size,
+# new modes, the levels changed or all levels of a new stack, lastX and entry
+
+def dump_change(engine, record, new_modes):
+    """Return the bytes of the changes of a keystroke from its UNDO record (or None), with {new_modes}
+    if any, or None if a snapshot is needed."""
+    stack = engine.stack
+    old, log, lastx, entry = record[:4] if record else (stack, None, engine.lastx, engine.entry)
+    flags = (lastx is not engine.lastx) | (entry is not engine.entry) << 1 | bool(new_modes) << 2
+    if old is not stack:  # Another stack: all its levels
+        if len(stack) > SWAPPED_LEVELS: return None
+        flags |= 8; changes = list(enumerate(stack))
+    elif engine.fixed: changes = list(enumerate(stack)) if log else []  # Only 4 levels
+    else:
+        indexes = set()
+        for i, value in log[1:] if log else ():
+            if i < 0: return None  # Buffers replaced
+            if i < stack.size: indexes.add(i)
+        changes = [(i, stack.get(i)) for i in sorted(indexes)]
+    out = [pack("<BII", flags, len(stack), len(changes))]
+    if new_modes: out.append(pack("<BBBBH", *new_modes))
+    for i, value in changes: out.append(pack("<I", i)); dump_value(out, value)
+    if flags & 1: dump_value(out, engine.lastx)
+    if flags & 2: dump_value(out, engine.entry)
+    return b"".join(out)
+
+def load_change(engine, reader):
+    """Apply the next entry of a journal, read whole before anything changes."""
+    flags, size, count = unpack("<BII", reader.take(9))
+    new_modes = unpack("<BBBBH", reader.take(6)) if flags & 4 else None
+    changes = [(reader.integer(), reader.value()) for k in range(count)]
+    lastx = reader.value() if flags & 1 else engine.lastx
+    entry = reader.value() if flags & 2 else engine.entry
+    if new_modes: use_modes(engine, *new_modes)
+    stack = engine.stack
+    if flags & 8:
+        values = [value for level, value in changes]
+        engine.stack = FixedStack(values) if engine.fixed else DynamicStack(values)
+    elif engine.fixed:
+        for level, value in changes: stack[level] = value
+    else:
+        while len(stack) > size: stack.pop()
+        while len(stack) < size: stack.push(0.0)
+        for i, value in changes: stack.set(i, value)
+    engine.lastx = lastx; engine.entry = entry
+
+
+class Session:
+    """Files keeping the state of the engine, journaled after each keystroke."""
+
+    def __init__(self):
+        self.journal = None  # Journal file open for appending
+        self.generation = 0; self.modes = None  # Those of the last snapshot, then of the last entry
+        self.bytes = 0  # Journal bytes since the last snapshot
+        self.written = None  # Time of the last entry not written out yet
+        self.kept = True  # False once files could not be written
+
+    def resume(self):
+        """Return an engine in the state of the last session, or a new one."""
+        engine = RPNEngine(); cut = False
+        try:
+            with open(SNAPSHOT, "rb") as file: data = file.read()
+        except (OSError, NameError): return engine  # No session yet, or no file system
+        try:
+            self.generation = load(engine, Reader(data))
+            try:
+                with open(JOURNAL, "rb") as file: data = file.read()
+            except OSError: data = b""
+            reader = Reader(data)
+            if data[:8] == MAGIC + pack("<I", self.generation):
+                reader.take(8)
+                try:
+                    while reader.position < len(data): load_change(engine, reader)
+                    self.journal = open(JOURNAL, "ab"); self.bytes = reader.position
+                    self.modes = modes(engine)
+                except ValueError: cut = True  # Entry cut short: the keystrokes before it are kept
+        except Exception:
+            self.close(); self.modes = None; return RPNEngine()  # Invalid session: start afresh
+        if cut:  # A snapshot, so that no entry is appended after the bytes cut short
+            try: self.snapshot(engine)
+            except (OSError, NameError): self.close(); self.kept = False
+        return engine
+
+    def save(self, engine):
+        """Journal the changes of the last keystroke, if any."""
+        change = engine.change; current = modes(engine)
+        if not self.kept or change is None and (not self.journal or current == self.modes): return
+        data = None
+        if self.journal and self.bytes < JOURNAL_BYTES:
+            data = dump_change(engine, change, current != self.modes and current)
+        try:
+            if data is None: self.snapshot(engine)
+            else: self.journal.write(data); self.bytes += len(data); self.modes = current; self.written = monotonic()
+        except (OSError, NameError): self.close(); self.kept = False
+
+    def idle(self):
+        """Write the journal out, once the keyboard has been idle for FLUSH_DELAY after a keystroke."""
+        if self.written is None or monotonic() - self.written < FLUSH_DELAY: return
+        self.written = None
+        try: self.journal.flush()
+        except OSError: self.close(); self.kept = False
+
+    def snapshot(self, engine):
+        """Write the whole state, and start an empty journal after it."""
+        self.close()
+        self.generation += 1
+        name = SNAPSHOT + ".new" if rename else SNAPSHOT
+        with open(name, "wb") as file: file.write(dump(engine, self.generation))
+        if rename: rename(name, SNAPSHOT)
+        self.journal = open(JOURNAL, "wb")
+        self.journal.write(MAGIC + pack("<I", self.generation)); self.journal.flush()
+        self.bytes = 0; self.modes = modes(engine); self.written = None
+
+    def close(self):
+        """Write the journal out and close it, eg. before quitting."""
+        if self.journal: self.journal.close(); self.journal = None
+        self.written = None
@@ -0,0 +1,237 @@
+# RPN STACKS
+#
+# Level 0 is the stack top (X), as on screen. Both stacks share the same API,
+# so the engine does not care whether the stack is dynamic or fixed.
+
+from array import array
+
+FLOAT, INT, BIG = 0, 1, 2  # Kinds of dynamic stack levels: BIG for big integers and decimals
+EXACT = 2**53  # Integers up to this magnitude are exact as floats
+ENTRY_BYTES = 16  # Estimated bytes of each entry of an undo log
+
+
+class DynamicStack:
+    """Unlimited stack stored top-at-end, so that push, pop, swap, over and pick are O(1).
+
+    Values are kept in a compact array of floats, with a kind byte per level: integers
+    exact as floats are stored as floats, and only bigger ones, or decimals, in a side table.
+    """
+
+    def __init__(self, values=()):
+        self.log = None  # Former values of the levels overwritten, while logging for UNDO
+        self.clear()
+        values = list(values); values.reverse()
+        for value in values: self.push(value)
+
+    def __len__(self):
+        return self.size
+
+    def get(self, i):
+        """Return the value at index i, from the bottom."""
+        kind = self.kinds[i]
+        if kind == FLOAT: return self.values[i]
+        if kind == INT: return int(self.values[i])
+        return self.big[i]
+
+    def set(self, i, value):
+        """Store a value at index i, from the bottom."""
+        if self.log is not None: self.log.append((i, self.get(i)))
+        if self.kinds[i] == BIG: del self.big[i]
+        if isinstance(value, float): self.values[i] = value; self.kinds[i] = FLOAT
+        elif isinstance(value, int) and -EXACT <= value <= EXACT: self.values[i] = value; self.kinds[i] = INT
+        else: self.big[i] = value; self.kinds[i] = BIG
+
+    def __getitem__(self, level):
+        if not 0 <= level < self.size: raise IndexError("stack level out of range")
+        return self.get(self.size - 1 - level)
+
+    def __setitem__(self, level, value):
+        if not 0 <= level < self.size: raise IndexError("stack level out of range")
+        self.set(self.size - 1 - level, value)
+
+    def __iter__(self):
+        """Iterate from stack top down to the bottom level."""
+        for i in range(self.size - 1, -1, -1): yield self.get(i)
+
+    def push(self, value):
+        i = self.size
+        if i == len(self.kinds): self.values.append(0.0); self.kinds.append(FLOAT)
+        self.size = i + 1
+        self.set(i, value)
+
+    def pop(self):
+        i = self.size - 1
+        value = self.get(i)
+        if self.log is not None: self.log.append((i, value))
+        if self.kinds[i] == BIG: del self.big[i]
+        self.kinds[i] = FLOAT; self.size = i
+        return value
+
+    def swap(self):
+        i = self.size - 1
+        x = self.get(i); self.set(i, self.get(i - 1)); self.set(i - 1, x)
+
+    def roll_down(self, n):
+        """Move the stack top down to level n-1, in O(n)."""
+        top = self.size - 1
+        x = self.get(top)
+        for i in range(top, top - n + 1, -1): self.set(i, self.get(i - 1))
+        self.set(top - n + 1, x)
+
+    def roll_up(self, n):
+        """Move level n-1 up to the stack top, in O(n)."""
+        top = self.size - 1
+        value = self.get(top - n + 1)
+        for i in range(top - n + 1, top): self.set(i, self.get(i + 1))
+        self.set(top, value)
+
+    def drop_to(self, level):
+        """Drop all levels from top down to the given one, in O(level)."""
+        for i in range(level + 1): self.pop()
+        if 2 * self.size + 16 < len(self.kinds):  # Give most of the memory back
+            if self.log is not None: self.log.append((-1, (self.values, self.kinds, self.big, self.size)))
+            self.values = self.values[:self.size]; self.kinds = self.kinds[:self.size]
+
+    def clear(self):
+        if self.log is not None: self.log.append((-1, (self.values, self.kinds, self.big, self.size)))
+        self.values = array("d"); self.kinds = bytearray(); self.big = {}
+        self.size = 0
+
+    def adopt(self, values, kinds, big, size):
+        """Take new buffers for all levels, logged as a single change."""
+        if self.log is not None: self.log.append((-1, (self.values, self.kinds, self.big, self.size)))
+        self.values = values; self.kinds = kinds; self.big = big; self.size = size
+
+    def replace(self, values):
+        """Replace all levels by values, from the bottom, logged as a single change."""
+        new = DynamicStack()
+        for value in values: new.push(value)
+        self.adopt(new.values, new.kinds, new.big, new.size)
+
+    # Undo logs: the former value of each level overwritten, and the former buffers when replaced
+
+    def start_log(self):
+        self.log = [self.size]
+
+    def stop_log(self):
+        log = self.log; self.log = None
+        return log
+
+    def unchanged(self, log):
+        return len(log) == 1 and log[0] == self.size
+
+    def pause_log(self):
+        """Log a copy of all levels, and stop logging: cheaper than logging a long run of changes."""
+        log = self.log
+        if log is not None:
+            log.append((-1, (array("d", self.values), bytearray(self.kinds), dict(self.big), self.size)))
+            self.log = None
+        return log
+
+    def resume_log(self, log):
+        self.log = log
+
+    def log_bytes(self, log):
+        return ENTRY_BYTES * len(log) + sum(9 * len(entry[1][1]) for entry in log[1:] if entry[0] < 0)
+
+    def revert(self, log):
+        """Put back the levels of a log, and return the log that redoes the changes."""
+        self.start_log()
+        for k in range(len(log) - 1, 0, -1):
+            i, old = log[k]
+            if i >= 0: self.set(i, old)
+            else:
+                self.log.append((-1, (self.values, self.kinds, self.big, self.size)))
+                self.values, self.kinds, self.big, self.size = old
+        self.size = log[0]
+        return self.stop_log()
+
+
+class FixedStack:
+    """XYZT stack in a 4-slot ring buffer: the oldest level is overwritten on push, T kept on drop."""
+
+    def __init__(self, values=()):
+        self.items = [0, 0, 0, 0]; self.top = 0; self.log = None
+        for level, value in enumerate(values):
+            if level < 4: self.items[-level % 4] = value
+
+    def __len__(self):
+        return 4
+
+    def __getitem__(self, level):
+        return self.items[(self.top - level) % 4]
+
+    def __setitem__(self, level, value):
+        self.items[(self.top - level) % 4] = value
+
+    def __iter__(self):
+        """Iterate from X down to T."""
+        for level in range(4): yield self[level]
+
+    def push(self, value):
+        self.top = (self.top + 1) % 4
+        self.items[self.top] = value
+
+    def pop(self):
+        """Drop X, T keeping its value."""
+        items = self.items; top = self.top
+        value = items[top]
+        items[top] = items[(top + 1) % 4]  # New T slot
+        self.top = (top - 1) % 4
+        return value
+
+    def swap(self):
+        self[0], self[1] = self[1], self[0]
+
+    def roll_down(self, n):
+        if n == 4:
+            self.top = (self.top - 1) % 4
+        else:
+            x = self[0]
+            for level in range(n - 1): self[level] = self[level + 1]
+            self[n - 1] = x
+
+    def roll_up(self, n):
+        if n == 4:
+            self.top = (self.top + 1) % 4
+        else:
+            value = self[n - 1]
+            for level in range(n - 1, 0, -1): self[level] = self[level - 1]
+            self[0] = value
+
+    def drop_to(self, level):
+        for i in range(level + 1): self.pop()
+
+    def clear(self):
+        self.items = [0, 0, 0, 0]; self.top = 0
+
+    def replace(self, values):
+        """Replace all levels by values, from the bottom, the levels above them set to 0."""
+        self.clear()
+        for value in values: self.push(value)
+
+    # Undo logs: a copy of the 4 slots, as cheap as logging changes
+
+    def start_log(self):
+        self.log = (list(self.items), self.top)
+
+    def stop_log(self):
+        log = self.log; self.log = None
+        return log
+
+    def unchanged(self, log):
+        return log[1] == self.top and all(log[0][i] is self.items[i] for i in range(4))
+
+    def pause_log(self):
+        return self.log
+
+    def resume_log(self, log):
+        self.log = log
+
+    def log_bytes(self, log):
+        return 4 * ENTRY_BYTES
+
+    def revert(self, log):
+        self.start_log()
+        self.items = list(log[0]); self.top = log[1]
+        return self.stop_log()
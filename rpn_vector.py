@@ -0,0 +1,100 @@
+from array import array
+from math import pi
+
+from rpn_engine import ANGLE_IN, ANGLE_OUT, UNARY
+from rpn_stack import EXACT, FLOAT, INT
+
+try: import numpy
+except ImportError: numpy = None  # MicroPython: plain loops
+
+
+# WHOLE-STACK OPERATIONS
+#
+# A unary operation mapped over all levels, a binary one with the same operand,
+# reductions to a single level, sort and reverse: each builds all new levels first,
+# so that an error leaves the stack as it was, then replaces them at once, logged
+# as a single change for UNDO, and drawn once. With NumPy (on a computer), stacks
+# of floats are processed as vectors, read straight from the array of the dynamic
+# stack; elsewhere, and for exact numbers, in a plain loop.
+
+VECTOR_LEVELS = 64  # Levels from which NumPy is worth its overhead
+ARITHMETIC = ("sq", "inv", "chs", "f>c", "c>f")  # Unary operations that work on vectors as they are
+REDUCE = ("sum", "prod", "mean", "min", "max")
+
+
+def levels(stack, top=0):
+    """Return the values of the stack from the bottom, without its {top} first levels."""
+    values = list(stack); values.reverse()
+    return values[:len(values) - top]
+
+def vector(engine, top=0):
+    """Return the levels of a stack of floats as a NumPy vector from the bottom, or None for plain loops."""
+    stack = engine.stack
+    if numpy is None or engine.numbers or engine.fixed or stack.big or len(stack) - top < VECTOR_LEVELS: return None
+    return numpy.frombuffer(stack.values, numpy.float64, stack.size - top)
+
+def vector_unary(name, degrees):
+    """Return the NumPy version of a unary operation, or None."""
+    if numpy is None: return None
+    if name in ARITHMETIC: return UNARY[name]
+    np = numpy
+    function = {"exp": np.exp, "ln": np.log, "log": np.log10, "sqrt": np.sqrt, "sin": np.sin, "cos": np.cos,
+                "tan": np.tan, "asin": np.arcsin, "acos": np.arccos, "atan": np.arctan}.get(name)
+    if function and degrees and name in ANGLE_IN: return lambda x: function(x * pi / 180)
+    if function and degrees and name in ANGLE_OUT: return lambda x: function(x) * 180 / pi
+    return function
+
+def store(engine, results, function):
+    """Replace the levels by a vector of results, kept as python_int() would, or return False if one of
+    them is not finite, for the plain loop to report the error."""
+    if not numpy.isfinite(results).all(): return False
+    stack = engine.stack
+    results = results + 0.0  # A copy, with -0.0 as 0, as python_int() gives
+    integral = results == numpy.floor(results)
+    kinds = numpy.where(integral, INT, FLOAT).astype(numpy.uint8)
+    exact = [(int(i), stack.get(int(i))) for i in numpy.flatnonzero(integral & (numpy.abs(results) > EXACT))]
+    stack.adopt(array("d", results.tobytes()), bytearray(kinds.tobytes()), {}, len(results))
+    for i, value in exact: stack.set(i, engine.convert(function(value)))  # Big integers, exact as in the loop
+    return True
+
+def map_levels(engine, function, vector_function=None, top=0):
+    """Replace the levels, but the {top} first ones dropped, by {function} of each."""
+    x = vector(engine, top) if vector_function else None
+    if x is not None:
+        with numpy.errstate(all="ignore"): results = vector_function(x)
+        if store(engine, results, function): return
+    convert = engine.convert
+    engine.stack.replace([convert(function(value)) for value in levels(engine.stack, top)])
+
+def reduce_levels(engine, name):
+    """Replace all levels by their sum, product, mean, minimum or maximum."""
+    x = vector(engine); result = None
+    if x is not None:
+        with numpy.errstate(all="ignore"): result = float(getattr(x, name)())
+        if not abs(result) <= EXACT: result = None  # Overflow, or a big integer: exact in the loop
+    if result is None:
+        values = levels(engine.stack)
+        if name == "min": result = min(values)
+        elif name == "max": result = max(values)
+        elif name == "prod":
+            result = values[0]
+            for value in values[1:]: result = result * value
+        else:
+            result = values[0]
+            for value in values[1:]: result = result + value
+            if name == "mean": result = result / len(values)
+    engine.stack.replace([engine.convert(result)])
+
+def order_levels(engine, name):
+    """Sort the levels, the smallest in X, or reverse them."""
+    stack = engine.stack
+    x = vector(engine)
+    if x is not None:
+        order = numpy.argsort(-x, kind="stable") if name == "sort" else slice(None, None, -1)
+        kinds = numpy.frombuffer(stack.kinds, numpy.uint8, stack.size)[order]
+        stack.adopt(array("d", x[order].tobytes()), bytearray(kinds.tobytes()), {}, stack.size)
+        return
+    values = levels(stack)
+    if name == "sort": values.sort(reverse=True)
+    else: values.reverse()
+    stack.replace(values)
@@ -0,0 +1,38 @@
+"""Tests of the screen of rpn.py, replayed on the stub modules of bench/stubs.
+
+    python -m pytest tests
+"""
+
+import sys
+import time
+from os.path import abspath, dirname, join
+
+sys.path.insert(0, join(dirname(abspath(__file__)), "..", "bench"))
+import bench_keys
+import kandinsky
+
+SCRIPT = join(dirname(abspath(__file__)), "..", "rpn.py")
+
+
+def cursor_bars(sequence, monkeypatch):
+    """Return the x of the cursor bars left on the command line after a key sequence."""
+    reset = kandinsky.reset
+    monkeypatch.setattr(kandinsky, "reset", lambda traced=False: reset(True))
+    monkeypatch.setattr(time, "monotonic", time.monotonic); monkeypatch.setattr(time, "sleep", time.sleep)
+    modules = {name: module for name, module in sys.modules.items() if name.startswith("rpn")}
+    try: bench_keys.run(SCRIPT, sequence)
+    finally:
+        for name in [name for name in sys.modules if name.startswith("rpn")]: del sys.modules[name]
+        sys.modules.update(modules)
+    bars = set()
+    for call in kandinsky.trace:
+        text = isinstance(call[0], str)  # draw_string(text, x, y, ...), or fill_rect(x, y, width, height, color)
+        x, y = call[1:3] if text else call[:2]
+        width, height = (10*len(call[0]), 18) if text else call[2:4]
+        if y <= 195 < y + height:
+            bars = {bar for bar in bars if not x <= bar < x + width}
+            if call[2:] == (1, 18, (0,0,0)): bars.add(x)
+    return sorted(bars)
+
+def test_no_cursor_left_behind(monkeypatch):
+    assert cursor_bars("1 2 3 ok 4 5 + 6 7 bs bs 8 left ok 1 2 left bs right 9", monkeypatch) == [25]
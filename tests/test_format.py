@@ -0,0 +1,28 @@
+"""Tests of rpn_format: floats written as their shortest round-trip decimal.
+
+    python -m pytest tests
+"""
+
+import sys
+from os.path import abspath, dirname, join
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+from rpn_format import format_number, split
+
+
+def test_distinct_floats_look_distinct():
+    assert format_number(0.1 + 0.2) == "0.30000000000000004"
+    assert format_number(0.3) == "0.3"
+
+def test_all_digits_of_a_large_float():
+    assert split(123456789012345.6) == ("", "1234567890123456", 14)
+    assert format_number(123456789012345.6) == "123456789012345.6"
+
+def test_round_trip():
+    for value in (0.1 + 0.2, 123456789012345.6, -1/3, 2**0.5, 1e-5, 5e-324, 1.5e300):
+        for mode in ("sci", "eng"): assert float(format_number(value, mode)) == value
+
+def test_zero_and_scientific_fallback():
+    assert format_number(0.0) == "0" and format_number(-0.0) == "0"
+    assert format_number(1e15) == "1e15"
+    assert format_number(2**0.5, width=10) == "1.414214e0"
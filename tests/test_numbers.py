@@ -0,0 +1,41 @@
+"""Tests of the number modes: switching them converts the stack, or changes nothing.
+
+    python -m pytest tests
+"""
+
+import sys
+from os.path import abspath, dirname, join
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+from rpn_engine import RPNEngine
+
+
+def run(engine, line):
+    """Return the error of the last token of a line that has one, or None."""
+    error = None
+    for token in line.split(): error = engine.run(token) or error
+    return error
+
+def test_out_of_range_levels_keep_the_mode():
+    engine = RPNEngine()
+    assert run(engine, "decimal 9 400 ^ 0.5 +") is None
+    big = engine.stack[0]
+    assert run(engine, "frac") == "math range error"
+    assert engine.numbers.__name__ == "rpn_decimal" and engine.stack[0] is big
+    assert run(engine, "decimal") == "math range error"
+    assert engine.numbers.__name__ == "rpn_decimal" and engine.stack[0] is big
+    assert run(engine, "drop 2 3 / decimal") is None and engine.numbers is None
+
+def test_out_of_range_fractions_keep_the_mode():
+    engine = RPNEngine()
+    assert run(engine, "frac 9 400 ^ 1 2 / +") is None
+    assert run(engine, "frac") == "math range error" and engine.numbers.__name__ == "rpn_fraction"
+
+def test_decimals_rescaled_exactly():
+    engine = RPNEngine()
+    assert run(engine, "decimal 1 3 / 30 decimal") is None
+    third = engine.stack[0]
+    assert engine.numbers.decimals == 30 and (third.n, third.scale) == (3333333333333333333333333 * 10**5, 30)
+    assert run(engine, "5 decimal") is None
+    assert str(engine.stack[0]) == "0.33333"
+    assert run(engine, "25 decimal") is None
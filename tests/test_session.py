@@ -0,0 +1,43 @@
+"""Tests of rpn_session: the state resumed from the snapshot and the journal.
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+from os.path import abspath, dirname, join
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+import rpn_decimal
+from rpn_session import JOURNAL, Session, modes
+
+
+def key(session, engine, token):
+    """Run a token as a keystroke, and journal it."""
+    engine.begin(); engine.run(token); engine.end()
+    session.save(engine)
+
+def state(engine):
+    return list(engine.stack), engine.lastx, engine.entry
+
+def test_resume_after_an_entry_cut_short(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    session = Session(); engine = session.resume()
+    for token in "1 2 3 +".split(): key(session, engine, token)
+    kept = state(engine)
+    key(session, engine, "*"); session.close()
+    with open(JOURNAL, "r+b") as file: file.truncate(os.path.getsize(JOURNAL) - 1)
+    session = Session(); engine = session.resume()
+    assert state(engine) == kept
+    for token in "4 swap -".split(): key(session, engine, token)
+    session.close()
+    assert state(Session().resume()) == state(engine) == ([-1, 1], 5, "")
+
+def test_resume_modes_and_undo(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path); monkeypatch.setattr(rpn_decimal, "decimals", rpn_decimal.decimals)
+    session = Session(); engine = session.resume()
+    for token in "1 3 / 30 decimal frac undo".split(): key(session, engine, token)
+    session.close()
+    resumed = Session().resume()
+    assert modes(resumed) == modes(engine) == (False, True, 1, 0, 30)
+    assert state(resumed) == state(engine) and str(resumed.stack[0]) == "0.3333333333333333"